@@ -0,0 +1,235 @@
+#Analyzer Class
+#Polynomial checks run before searching, explains in plain words why a month can't be scheduled
+from Solver import Solver
+from MinCostFlow import MinCostFlow
+from Eligibility import popcount, bitIndexes
+from Matching import hopcroftKarp
+
+class Analyzer(Solver):
+    '''
+        Looks for a certificate that the empty shifts of the calendar can't all be filled, cheapest checks first:
+            - shifts no employee can work
+            - days whose shifts can't be matched to different employees: a set of shifts (Hall violator) with fewer
+              employees able to work any of them than there are shifts
+            - weeks/months with more shifts than the employees can work in total, each employee counting for at most
+              their caps and the number of days they can work
+            - a minimum cut of the flow network source -> employee (maxshifts) -> employee's week (maxshiftspw)
+              -> employee's day (1) -> shift -> sink
+        The caps of an employee are nested (day in week in month), so the flow network is exact for availability,
+        one shift a day and the caps: if analyze finds nothing a complete schedule exists. analyze only reports, it leaves
+        the schedule to the engine chosen by the caller (the "flow" engine is the one which writes such a flow).
+    '''
+
+    def analyze(self):
+        '''
+            Loads the current calendar
+            @return: list of strings, the certificate of why the calendar can't be completed, empty if it can
+        '''
+        self._load()
+        res = self._emptyDomains()
+        if len(res) == 0:
+            res = self._hallViolations()
+        if len(res) == 0:
+            res = self._capacityBounds()
+        if len(res) == 0:
+            res = self._minCut()
+        return res
+
+    def _name(self, s):
+        '''@return: readable name of shift s'''
+        shiftDay, lunch, time = self.shifts[s]
+        return "day %d %s %s"%(shiftDay.dayNum, "lunch" if lunch else "dinner", time)
+
+    def _names(self, shifts):
+        return ", ".join([self._name(s) for s in shifts])
+
+    def _employees(self, bits):
+        return ", ".join([self.employees[e].getName() for e in bitIndexes(bits)])
+
+    def _emptyDomains(self):
+        res = []
+        for s in self.open:
+            if self.domains[s] == 0:
+                res.append("No employee can work %s (availability, exclusions or caps already reached)"%(self._name(s)))
+        return res
+
+    def _hallViolations(self):
+        '''
+            Per day, after a maximum matching of the shifts to the employees the shifts reachable from an unmatched shift
+            by alternating paths have fewer candidates than there are of them (Konig)
+        '''
+        res = []
+        for dayNum in sorted(self.openByDay.keys()):
+            shifts = self.openByDay[dayNum]
+            adj = [bitIndexes(self.domains[s]) for s in shifts]
+            size, matchLeft = hopcroftKarp(adj, self.matrix.numEmployees())
+            if size == len(shifts):
+                continue
+            matchRight = {}
+            for i in range(0, len(shifts)):
+                if matchLeft[i] != -1:
+                    matchRight[matchLeft[i]] = i
+            reached = [i for i in range(0, len(shifts)) if matchLeft[i] == -1]
+            seen = set(reached)
+            people = 0
+            j = 0
+            while j < len(reached):
+                for e in adj[reached[j]]:
+                    people |= 1 << e
+                    i = matchRight[e]
+                    if i not in seen:
+                        seen.add(i)
+                        reached.append(i)
+                j += 1
+            violator = sorted([shifts[i] for i in reached])
+            res.append("Day %d: %d shifts (%s) but only %d employees can work them (%s)"%(dayNum, len(violator), self._names(violator),
+                                                                                         popcount(people), self._employees(people)))
+        return res
+
+    def _capacity(self, e, shifts):
+        '''@return: most of shifts employee e can work, from their caps and the number of days they can work'''
+        m = self.matrix
+        days = set()
+        weeks = {}
+        for s in shifts:
+            if (self.domains[s] >> e) & 1:
+                days.add(m.shiftDay[s])
+                weeks.setdefault(m.shiftWeek[s], set()).add(m.shiftDay[s])
+        total = 0
+        for week in weeks.keys():
+            count = len(weeks[week])
+            if m.maxShiftsPW[e] != None:
+                count = min(count, m.maxShiftsPW[e] - self.weekCount[e][week])
+            total += count
+        if m.maxShifts[e] != None:
+            total = min(total, m.maxShifts[e] - self.monthCount[e])
+        return total
+
+    def _capacityBounds(self):
+        res = []
+        m = self.matrix
+        periods = [("Week %d"%(week), self.openByWeek[week]) for week in sorted(self.openByWeek.keys())]
+        periods.append(("The month", self.open))
+        for name, shifts in periods:
+            total = sum([self._capacity(e, shifts) for e in range(0, m.numEmployees())])
+            if total < len(shifts):
+                res.append("%s has %d empty shifts but the employees can work at most %d of them (caps and one shift a day)"%(name, len(shifts), total))
+        return res
+
+    def _network(self, shifts, domains, maxShifts, maxShiftsPW, costs=None):
+        '''
+            Builds the flow network source -> employee -> employee's week -> employee's day -> shift -> sink
+            @params shifts: list of the indexes of the shifts to fill
+            @params domains: list of bitsets, domains[s] has bit e set if employee e can work shift s
+            @params maxShifts, maxShiftsPW: lists of caps per employee, None is no cap
+            @params costs: costs[s][e] is the cost of the edge from employee e's day to shift s, 0 if None
+            @return: (network, list of (from, to, edge, description of its capacity), first day node, first shift node, days)
+        '''
+        m = self.matrix
+        numEmps = m.numEmployees()
+        days = sorted(set([m.shiftDay[s] for s in shifts]))
+        weeks = sorted(set([m.shiftWeek[s] for s in shifts]))
+        source = 0
+        sink = 1
+        empNode = 2
+        weekNode = empNode + numEmps
+        dayNode = weekNode + numEmps*len(weeks)
+        shiftNode = dayNode + numEmps*len(days)
+        net = MinCostFlow(shiftNode + len(shifts))
+        cuts = []
+        for e in range(0, numEmps):
+            name = self.employees[e].getName()
+            cap = len(shifts)
+            if maxShifts[e] != None:
+                cap = max(0, maxShifts[e] - self.monthCount[e])
+            cuts.append((source, empNode + e, net.addEdge(source, empNode + e, cap, 0), "%s: %d more shifts this month (maxshifts)"%(name, cap)))
+            for w in range(0, len(weeks)):
+                cap = len(shifts)
+                if maxShiftsPW[e] != None:
+                    cap = max(0, maxShiftsPW[e] - self.weekCount[e][weeks[w]])
+                cuts.append((empNode + e, weekNode + e*len(weeks) + w, net.addEdge(empNode + e, weekNode + e*len(weeks) + w, cap, 0),
+                             "%s: %d more shifts in week %d (maxshiftspw)"%(name, cap, weeks[w])))
+        weekOf = {}
+        for s in shifts:
+            weekOf[m.shiftDay[s]] = weeks.index(m.shiftWeek[s])
+        for d in range(0, len(days)):
+            w = weekOf[days[d]]
+            for e in range(0, numEmps):
+                cuts.append((weekNode + e*len(weeks) + w, dayNode + e*len(days) + d, net.addEdge(weekNode + e*len(weeks) + w, dayNode + e*len(days) + d, 1, 0),
+                             "%s: one shift on day"%(self.employees[e].getName())))
+        for i in range(0, len(shifts)):
+            s = shifts[i]
+            d = days.index(m.shiftDay[s])
+            for e in bitIndexes(domains[s]):
+                cost = 0
+                if costs != None:
+                    cost = costs[s][e]
+                cuts.append((dayNode + e*len(days) + d, shiftNode + i, net.addEdge(dayNode + e*len(days) + d, shiftNode + i, 1, cost),
+                             "%s works %s"%(self.employees[e].getName(), self._name(s))))
+            net.addEdge(shiftNode + i, sink, 1, 0)
+        return net, cuts, dayNode, shiftNode, days
+
+    def _assignFlow(self, shifts, cuts, dayNode, shiftNode, days):
+        '''Assigns each shift of a network built by _network to the employee whose day -> shift edge carries flow'''
+        for u, v, edge, desc in cuts:
+            if u >= dayNode and u < shiftNode and v >= shiftNode and edge[1] == 0:
+                self._assign(shifts[v - shiftNode], (u - dayNode)//len(days))
+
+    def _priorityCosts(self):
+        '''@return: costs for _network, each shift edge costs the employee's priority (shifted to be non negative), None if priorities aren't integers'''
+        priorities = self.matrix.priorities
+        if len(priorities) == 0 or len([p for p in priorities if type(p) != int]) > 0:
+            return None
+        low = min(priorities)
+        row = [p - low for p in priorities]
+        return [row]*self.matrix.numShifts()
+
+    def _sinkSide(self, net, sink):
+        '''@return: set of the nodes which can still reach the sink in the residual network, the sink side of a minimum cut'''
+        back = [[] for u in range(0, net.numNodes)]
+        for u in range(0, net.numNodes):
+            for v, capacity, c, rev in net.graph[u]:
+                if capacity > 0:
+                    back[v].append(u)
+        sinkSide = set([sink])
+        queue = [sink]
+        while len(queue) > 0:
+            v = queue.pop()
+            for u in back[v]:
+                if u not in sinkSide:
+                    sinkSide.add(u)
+                    queue.append(u)
+        return sinkSide
+
+    def _minCut(self):
+        '''
+            Max flow of the exact network, if it can't fill every shift the shifts on the sink side of a minimum cut
+            need more than the capacity of the cut edges leading to them
+        '''
+        m = self.matrix
+        source = 0
+        sink = 1
+        net, cuts, dayNode, shiftNode, days = self._network(self.open, self.domains, m.maxShifts, m.maxShiftsPW)
+        flow, cost = net.run(source, sink)
+        if flow == len(self.open):
+            return []
+
+        sinkSide = self._sinkSide(net, sink)
+        shifts = [self.open[i] for i in range(0, len(self.open)) if shiftNode + i in sinkSide]
+        limits = []
+        total = 0
+        perDay = {} #description of the one shift a day limits -> days
+        for u, v, edge, desc in cuts:
+            capacity = edge[1] + net.graph[v][edge[3]][1]
+            if u in sinkSide or v not in sinkSide or capacity == 0:
+                continue
+            total += capacity
+            if v >= dayNode and v < shiftNode:
+                perDay.setdefault(desc, []).append(str(days[(v - dayNode) % len(days)]))
+            else:
+                limits.append(desc)
+        for desc in sorted(perDay.keys()):
+            limits.append("%ss %s"%(desc, ", ".join(perDay[desc])))
+        res = ["%d shifts can't all be filled, at most %d of them can (%s)"%(len(shifts), total, self._names(shifts))]
+        res.append("They can only be filled through: %s"%("; ".join(limits)))
+        return res
@@ -0,0 +1,89 @@
+#Availability Tensor Class
+#Whole-roster availability as an [employee, day, meal, shift-slot] array answering roster queries in one reduction
+try:
+    import numpy
+except ImportError:
+    numpy = None #optional, the queries then use the bitsets of the EligibilityMatrix
+
+from Eligibility import popcount
+
+class AvailabilityTensor:
+    '''
+        tensor[e, d, meal, slot] is True if employee e can work the slot-th shift (earliest first) of meal (0 lunch,
+        1 dinner) of the d-th day with shifts, exists[d, meal, slot] is True if that shift exists.
+        Built from an EligibilityMatrix so the rules are only evaluated once (its bitsets are unpacked into the tensor in
+        one call), and the solvers keep reading the matrix: the search tests one (employee, shift) pair at a time, which
+        integer bitsets do faster than array indexing. The tensor serves the reports (see Scheduler.printAvailability).
+        With NumPy each query is one reduction over the tensor, without it the same answers come from popcounts
+        of the matrix's bitsets. Queries return plain lists and dictionaries either way.
+    '''
+
+    def __init__(self, matrix, useNumpy=None):
+        '''
+            @params matrix: EligibilityMatrix
+            @params useNumpy: T/F whether to build the NumPy tensor, None to build it if NumPy is installed
+        '''
+        if useNumpy == None:
+            useNumpy = numpy != None
+        assert not useNumpy or numpy != None, "NumPy is not installed"
+        self.matrix = matrix
+        self.useNumpy = useNumpy
+        self.days = sorted(set(matrix.shiftDay)) #day numbers of the days with shifts, d is the index in this list
+        self.index = [] #(d, meal, slot) of each shift of the matrix
+        dayIndex = {}
+        for d in range(0, len(self.days)):
+            dayIndex[self.days[d]] = d
+        slots = {}
+        for s in range(0, matrix.numShifts()):
+            key = (dayIndex[matrix.shiftDay[s]], 0 if matrix.shiftLunch[s] else 1)
+            slots[key] = slots.get(key, -1) + 1 #the matrix lists the shifts of a meal earliest first
+            self.index.append(key + (slots[key],))
+        self.numSlots = max([0] + [count + 1 for count in slots.values()])
+
+        if useNumpy:
+            shape = (len(self.days), 2, self.numSlots)
+            self.exists = numpy.zeros(shape, dtype=bool)
+            self.tensor = numpy.zeros((matrix.numEmployees(),) + shape, dtype=bool)
+            where = tuple(numpy.array(self.index, dtype=int).reshape(-1, 3).T)
+            self.exists[where] = True
+            self.tensor[(slice(None),) + where] = self._unpack(matrix.available, matrix.numShifts())
+
+    def _unpack(self, bitsets, width):
+        '''@return: boolean array of shape (len(bitsets), width), row i holds the bits of bitsets[i], bit s in column s'''
+        numBytes = (width + 7)//8
+        raw = b"".join([bits.to_bytes(numBytes, "little") for bits in bitsets])
+        rows = numpy.frombuffer(raw, dtype=numpy.uint8).reshape(len(bitsets), numBytes)
+        return numpy.unpackbits(rows, axis=1, bitorder="little")[:, :width].astype(bool)
+
+    def candidates(self):
+        '''@return: list of the number of employees who can work each shift, in the order of the matrix'''
+        if self.useNumpy:
+            counts = self.tensor.sum(axis=0)
+            return [int(counts[d, meal, slot]) for d, meal, slot in self.index]
+        return [popcount(bits) for bits in self.matrix.eligible]
+
+    def coverage(self):
+        '''@return: list of the number of shifts each employee can work, in the order of the matrix'''
+        if self.useNumpy:
+            return self.tensor.sum(axis=(1, 2, 3)).tolist()
+        return [popcount(bits) for bits in self.matrix.available]
+
+    def slack(self):
+        '''
+            An employee works one shift a day at most, so a day whose slack is negative can't be filled
+            @return: dictionary dayNum -> number of employees who can work that day minus its number of shifts
+        '''
+        if self.useNumpy:
+            working = self.tensor.any(axis=(2, 3)).sum(axis=0)
+            shifts = self.exists.sum(axis=(1, 2))
+            return dict(zip(self.days, (working - shifts).tolist()))
+        m = self.matrix
+        working = {}
+        shifts = {}
+        for s in range(0, m.numShifts()):
+            working[m.shiftDay[s]] = working.get(m.shiftDay[s], 0) | m.eligible[s]
+            shifts[m.shiftDay[s]] = shifts.get(m.shiftDay[s], 0) + 1
+        res = {}
+        for dayNum in self.days:
+            res[dayNum] = popcount(working[dayNum]) - shifts[dayNum]
+        return res
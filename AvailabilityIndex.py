@@ -0,0 +1,65 @@
+#Availability Index Class
+#Inverted index from a shift to the employees whose rules allow it, kept up to date as employees and rules change
+
+class AvailabilityIndex:
+    '''
+        Maps (weekday, weeknum, daynum, lunch, (hour, minute)) of a shift to the ids of the employees whose availability
+        & exclude rules allow it (maxshifts caps are not static, they are not part of the index).
+        A shift is looked up over every employee the first time, then kept up to date one employee at a time:
+        adding or removing an employee, or adding or deleting one of their rules (the index listens to each employee),
+        only re-evaluates that employee for the shifts already in the index.
+    '''
+
+    def __init__(self):
+        self.employees = {} #id -> Employee object
+        self.shifts = {} #key of the shift -> set of the ids of the employees who can work it
+        self.times = {} #key of the shift -> its Time object, to evaluate the rules again
+        self.lookups = 0 #number of calls to eligible
+        self.misses = 0 #shifts evaluated over every employee because they weren't in the index yet
+
+    def addEmployee(self, employee):
+        '''Adds employee to every shift of the index their rules allow, and follows their rule changes'''
+        if id(employee) in self.employees:
+            return
+        self.employees[id(employee)] = employee
+        employee.addListener(self.update)
+        self.update(employee)
+
+    def removeEmployee(self, employee):
+        if id(employee) not in self.employees:
+            return
+        del self.employees[id(employee)]
+        employee.removeListener(self.update)
+        for ids in self.shifts.values():
+            ids.discard(id(employee))
+
+    def contains(self, employee):
+        return id(employee) in self.employees
+
+    def update(self, employee):
+        '''Re-evaluates the rules of employee for every shift of the index'''
+        for key, ids in self.shifts.items():
+            weekday, weeknum, daynum, lunch, minutes = key
+            time = self.times[key]
+            if employee.matchAvailability(lunch, time, weekday, weeknum, daynum):
+                ids.add(id(employee))
+            else:
+                ids.discard(id(employee))
+
+    def eligible(self, lunch, time, weekday, weeknum, daynum):
+        '''
+            @params: see Employee.matchAvailability
+            @return: list of the Employee objects of the index whose rules allow that shift
+        '''
+        self.lookups += 1
+        key = (weekday, weeknum, daynum, lunch, (time.hour, time.minute))
+        ids = self.shifts.get(key)
+        if ids == None:
+            self.misses += 1
+            ids = set()
+            for employee in self.employees.values():
+                if employee.matchAvailability(lunch, time, weekday, weeknum, daynum):
+                    ids.add(id(employee))
+            self.shifts[key] = ids
+            self.times[key] = time
+        return [self.employees[i] for i in ids]
@@ -0,0 +1,128 @@
+#Batch Class
+#Solves the schedules of several months and restaurants in one call, without the UI, in a pool of worker processes
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from Analyzer import Analyzer
+from Eligibility import RuleCache
+from Result import SolveResult
+from Portfolio import _runConfig
+
+def _runJob(matrix, fixed, options, timeLimit, nodeLimit):
+    '''
+        Solves the model of one job in a worker process
+        @return: (seconds, result of _runConfig)
+    '''
+    start = time.perf_counter()
+    res = _runConfig(matrix, fixed, options, -1, None, None, timeLimit, nodeLimit)
+    return time.perf_counter() - start, res
+
+def solveAll(jobs, workers=None):
+    '''
+        @params jobs: list of (Scheduler, config), see Batch.add
+        @params workers: maximum number of processes, the number of cores if None
+        @return: list of SolveResult, one per job in the same order
+    '''
+    batch = Batch(workers)
+    for scheduler, config in jobs:
+        batch.add(scheduler, config)
+    return batch.run()
+
+class Batch:
+    '''
+        A job is a Scheduler and a config: Solver options (forwardCheck, variableOrder, ...) plus timeLimit and nodeLimit
+        for that job. Scheduler objects can't be sent to other processes, so this process clears each calendar, builds its
+        EligibilityMatrix and runs the Analyzer on it, whose model is the one solved. Every matrix is built with the same RuleCache: an employee who is
+        in several jobs (every month of a quarter, several sites) has their rules evaluated once per distinct shift.
+        The jobs which can be scheduled are then searched in worker processes on their model (plain data), and each
+        schedule is written back into its calendar by employee name, or the best partial schedule if a limit was reached.
+    '''
+
+    def __init__(self, workers=None):
+        '''
+            @params workers: maximum number of processes, the number of cores if None. 1 solves the jobs in this process
+        '''
+        self.workers = workers
+        self.cache = RuleCache()
+        self.jobs = [] #(scheduler, config)
+        self.seconds = 0 #wall time of the last run
+
+    def add(self, scheduler, config=None):
+        '''
+            @params scheduler: Scheduler object, its calendar is cleared and scheduled again by run
+            @params config: dictionary of Solver options, timeLimit (seconds) and nodeLimit, {} if None
+            @return: index of the job, the position of its result in the list returned by run
+        '''
+        if config == None:
+            config = {}
+        self.jobs.append((scheduler, config))
+        return len(self.jobs) - 1
+
+    def run(self):
+        '''
+            @return: list of SolveResult, one per job in the order they were added. Their stats hold the seconds spent
+                     on the job (building its model, analyzing and solving, not waiting for a worker)
+        '''
+        start = time.perf_counter()
+        results = [None]*len(self.jobs)
+        todo = [] #(job index, analyzer holding the loaded calendar, options, timeLimit, nodeLimit, seconds spent so far)
+        for i in range(0, len(self.jobs)):
+            scheduler, config = self.jobs[i]
+            jobStart = time.perf_counter()
+            options = dict(config)
+            timeLimit = options.pop("timeLimit", None)
+            nodeLimit = options.pop("nodeLimit", None)
+            scheduler.cal.clearAllShifts()
+            analyzer = Analyzer(scheduler)
+            analyzer.cache = self.cache
+            certificate = analyzer.analyze()
+            if len(certificate) > 0:
+                results[i] = self._result(scheduler, SolveResult.INFEASIBLE, 0, time.perf_counter() - jobStart, certificate)
+                continue
+            todo.append((i, analyzer, options, timeLimit, nodeLimit, time.perf_counter() - jobStart))
+
+        if self.workers == 1 or len(todo) <= 1:
+            for job in todo:
+                i, solver, options, timeLimit, nodeLimit, seconds = job
+                results[i] = self._finish(job, _runJob(solver.matrix, self._open(solver), options, timeLimit, nodeLimit))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {}
+                for job in todo:
+                    i, solver, options, timeLimit, nodeLimit, seconds = job
+                    futures[pool.submit(_runJob, solver.matrix, self._open(solver), options, timeLimit, nodeLimit)] = job
+                pending = set(futures.keys())
+                while len(pending) > 0:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = futures[future]
+                        results[job[0]] = self._finish(job, future.result())
+        self.seconds = time.perf_counter() - start
+        return results
+
+    def _open(self, solver):
+        '''@return: fixed list of a job's model, run cleared the calendar so every shift is open whatever the analyzer assigned'''
+        return [None]*solver.matrix.numShifts()
+
+    def _finish(self, job, jobResult):
+        '''Writes the schedule found by a worker into the calendar of the job, @return: its SolveResult'''
+        i, solver, options, timeLimit, nodeLimit, seconds = job
+        solveSeconds, (res, names, nodes, stopped) = jobResult
+        if res or stopped:
+            index = {}
+            for e in range(0, len(solver.employees)):
+                index[solver.employees[e].getName()] = e
+            for s, name in names:
+                solver._assign(s, index[name])
+            solver._write()
+        status = SolveResult.INFEASIBLE
+        if res:
+            status = SolveResult.SOLVED
+        elif stopped:
+            status = SolveResult.TIMEOUT
+        return self._result(solver.scheduler, status, nodes, seconds + solveSeconds)
+
+    def _result(self, scheduler, status, nodes, seconds, certificate=None):
+        numOpen = sum([len(shiftDay.lunchShifts) + len(shiftDay.dinnerShifts) for shiftDay in scheduler.cal.days])
+        stats = {"engine" : "search", "nodes" : nodes, "seconds" : round(seconds, 3)}
+        return SolveResult(status, scheduler.getSchedule(), numOpen, stats, certificate)
@@ -0,0 +1,103 @@
+#Benchmark
+#Times the scheduling engines on a synthetic month, run with: python Benchmark.py [seed]
+import os
+import sys
+import time
+import random
+import contextlib
+
+from Time import Time
+from Rule import Rule
+from Employee import Employee
+from Scheduler import Scheduler
+from Solver import Solver
+
+LUNCH_TIMES = ["11:00", "11:30"]
+DINNER_TIMES = ["17:00", "17:30", "18:00", "18:30", "19:00"]
+
+class CountingScheduler(Scheduler):
+    '''
+        Scheduler which counts calls to matchShift, used to measure nodes of the recursive engine
+        A node is one (employee, shift) pair tested, the Solver only tests pairs allowed by its eligibility matrix.
+    '''
+
+    def __init__(self, month, year):
+        Scheduler.__init__(self, month, year)
+        self.nodes = 0
+
+    def matchShift(self, employee, l, t, wd, wn, d):
+        self.nodes += 1
+        return Scheduler.matchShift(self, employee, l, t, wd, wn, d)
+
+def quiet():
+    '''@return: context manager which discards everything printed inside it'''
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+def buildScheduler(month=3, year=2015, numEmployees=30, seed=2):
+    '''
+        Creates a scheduler for a month with a shift at every time of LUNCH_TIMES and DINNER_TIMES each day
+        and numEmployees employees with random weekday availability and maxshifts caps.
+        @return: CountingScheduler object
+    '''
+    rng = random.Random(seed)
+    with quiet():
+        sched = CountingScheduler(month, year)
+        days = list(range(1, sched.numDays+1))
+        sched.createShiftD(days, [Time(t) for t in LUNCH_TIMES], True)
+        sched.createShiftD(days, [Time(t) for t in DINNER_TIMES], False)
+
+        for i in range(0, numEmployees):
+            emp = Employee("emp%02d"%i, rng.randint(1, 5))
+            weekdays = sorted(rng.sample(range(0, 7), rng.randint(3, 6)))
+            emp.setRule(Rule(weekday=weekdays, time=rng.choice(["10:00", "16:00", "17:30"])))
+            if rng.random() < 0.5:
+                emp.setRule(Rule(lunch=False, weekday=sorted(rng.sample(range(0, 7), 2)), time="17:00"))
+            emp.setRule(Rule(maxshifts=rng.randint(8, 12)))
+            sched.addEmployee(emp)
+    return sched
+
+def timeRecursive(sched):
+    '''@return: (result, nodes, seconds) of Scheduler.assignEmployee on a cleared calendar'''
+    with quiet():
+        sched.cal.clearAllShifts()
+        sched.nodes = 0
+        start = time.perf_counter()
+        try:
+            res = sched.assignEmployee(1, sched.cal.getDay(1), sorted(sched.employeeList))
+        except RecursionError:
+            res = "RecursionError"
+        elapsed = time.perf_counter() - start
+    return res, sched.nodes, elapsed
+
+def timeSolver(sched, **options):
+    '''
+        @params options: keyword arguments passed to Solver
+        @return: (result, nodes, seconds) of Solver.solve on a cleared calendar
+    '''
+    with quiet():
+        sched.cal.clearAllShifts()
+        solver = Solver(sched, **options)
+        start = time.perf_counter()
+        res = solver.solve()
+        elapsed = time.perf_counter() - start
+    return res, solver.nodes, elapsed
+
+def report(name, res, nodes, elapsed):
+    print("%-12s result: %-6s nodes: %8d  time: %7.3fs  nodes/sec: %10.0f"%(name, res, nodes, elapsed, nodes/max(elapsed, 1e-9)))
+
+def main():
+    if len(sys.argv) > 1:
+        sched = buildScheduler(seed=int(sys.argv[1]))
+    else:
+        sched = buildScheduler()
+    numShifts = sum([len(d.lunchShifts) + len(d.dinnerShifts) for d in sched.cal.days])
+    print("%d employees, %d shifts in %d days"%(len(sched.employeeList), numShifts, sched.numDays))
+    report("recursive", *timeRecursive(sched))
+    report("calendar", *timeSolver(sched, variableOrder="calendar"))
+    report("calendar+fc", *timeSolver(sched, forwardCheck=True, variableOrder="calendar"))
+    report("calendar+bj", *timeSolver(sched, forwardCheck=True, variableOrder="calendar", backjump=True))
+    report("mrv", *timeSolver(sched))
+    report("mrv+fc", *timeSolver(sched, forwardCheck=True))
+
+if __name__ == "__main__":
+    main()
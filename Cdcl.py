@@ -0,0 +1,287 @@
+#CDCL SAT Solver
+#Small conflict driven clause learning solver for the CNF built by SatSolver, clauses use DIMACS literals (v or -v, v >= 1)
+import heapq
+
+class CDCL:
+    '''
+        Conflict driven clause learning:
+            - two watched literals per clause for unit propagation
+            - first UIP conflict analysis, the learnt clause makes the solver jump back to its second highest level
+            - VSIDS like variable activity (bumped on conflicts, decayed geometrically) with phase saving
+            - restarts following the Luby sequence
+        Learnt clauses are never deleted, the CNFs of a month stay small enough.
+        Internally literal v is 2*v and -v is 2*v+1, so the negation of a literal is lit^1.
+    '''
+
+    def __init__(self, numVars=0):
+        self.numVars = 0
+        self.ok = True #False once the clauses are known to be unsatisfiable
+        self.value = [0, 0] #value[lit]: 1 true, -1 false, 0 unassigned
+        self.level = [0] #decision level of each variable
+        self.reason = [None] #clause which implied each variable, None for decisions
+        self.activity = [0.0]
+        self.phase = [False] #last value of each variable, tried first on the next decision
+        self.watches = [[], []] #watches[lit]: clauses watching lit, visited when lit becomes false
+        self.trail = [] #assigned literals in assignment order
+        self.limits = [] #position in trail where each decision level starts
+        self.qhead = 0
+        self.order = [] #heap of (-activity, var), outdated entries are skipped
+        self.varInc = 1.0
+        self.conflicts = 0
+        self.decisions = 0
+        self.learnts = 0
+        self.interrupt = None #function called every few steps, the solve gives up when it returns True
+        self.interrupted = False
+        for i in range(0, numVars):
+            self.newVar()
+
+    def newVar(self):
+        '''@return: the new variable (positive DIMACS literal)'''
+        self.numVars += 1
+        self.value += [0, 0]
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches += [[], []]
+        heapq.heappush(self.order, (0.0, self.numVars))
+        return self.numVars
+
+    def addClause(self, clause):
+        '''
+            Adds a clause before solving
+            @params clause: list of DIMACS literals
+        '''
+        assert len(self.limits) == 0, "clauses can only be added at decision level 0"
+        lits = []
+        for l in clause:
+            assert l != 0 and abs(l) <= self.numVars, "unknown variable in clause %s"%(clause)
+            lit = 2*l if l > 0 else -2*l + 1
+            if self.value[lit] == 1 or lit^1 in lits:
+                return #already satisfied or tautology
+            if self.value[lit] == 0 and lit not in lits:
+                lits.append(lit)
+
+        if not self.ok:
+            return
+        if len(lits) == 0:
+            self.ok = False
+        elif len(lits) == 1:
+            self._enqueue(lits[0], None)
+            self.ok = self._propagate() == None
+        else:
+            self._watch(lits)
+
+    def solve(self):
+        '''
+            @return: True if the clauses are satisfiable, the model is then available through modelValue
+                     None if interrupt stopped the search
+        '''
+        if not self.ok:
+            return False
+        self.interrupted = False
+        restart = 1
+        while True:
+            res = self._search(100*_luby(restart))
+            if self.interrupted:
+                return None
+            if res != None:
+                return res
+            restart += 1
+
+    def modelValue(self, v):
+        '''@return: True/False value of variable v in the model found by solve'''
+        return self.value[2*v] == 1
+
+    def _watch(self, lits):
+        self.watches[lits[0]].append(lits)
+        self.watches[lits[1]].append(lits)
+
+    def _enqueue(self, lit, reason):
+        v = lit >> 1
+        self.value[lit] = 1
+        self.value[lit^1] = -1
+        self.level[v] = len(self.limits)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        '''
+            Unit propagation of every literal of the trail not propagated yet
+            @return: the conflicting clause, None if there is none
+        '''
+        value = self.value
+        while self.qhead < len(self.trail):
+            falseLit = self.trail[self.qhead]^1
+            self.qhead += 1
+            ws = self.watches[falseLit]
+            i = 0
+            j = 0
+            while i < len(ws):
+                c = ws[i]
+                i += 1
+                #keep the false watch in c[1]
+                if c[0] == falseLit:
+                    c[0] = c[1]
+                    c[1] = falseLit
+                if value[c[0]] == 1:
+                    ws[j] = c
+                    j += 1
+                    continue
+
+                found = False
+                for k in range(2, len(c)):
+                    if value[c[k]] != -1:
+                        c[1] = c[k]
+                        c[k] = falseLit
+                        self.watches[c[1]].append(c)
+                        found = True
+                        break
+                if found:
+                    continue
+
+                ws[j] = c
+                j += 1
+                if value[c[0]] == -1:
+                    #conflict, keep the clauses not visited yet
+                    while i < len(ws):
+                        ws[j] = ws[i]
+                        i += 1
+                        j += 1
+                    del ws[j:]
+                    return c
+                self._enqueue(c[0], c)
+            del ws[j:]
+        return None
+
+    def _analyze(self, conflict):
+        '''
+            First UIP learning
+            @return: (learnt clause with the asserting literal first, level to jump back to)
+        '''
+        seen = {}
+        learnt = [None]
+        pathCount = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        current = len(self.limits)
+        while True:
+            for q in clause if lit == None else clause[1:]:
+                v = q >> 1
+                if v not in seen and self.level[v] > 0:
+                    seen[v] = True
+                    self._bump(v)
+                    if self.level[v] == current:
+                        pathCount += 1
+                    else:
+                        learnt.append(q)
+            while (self.trail[index] >> 1) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reason[lit >> 1]
+            pathCount -= 1
+            if pathCount == 0:
+                break
+        learnt[0] = lit^1
+
+        back = 0
+        if len(learnt) > 1:
+            best = 1
+            for i in range(2, len(learnt)):
+                if self.level[learnt[i] >> 1] > self.level[learnt[best] >> 1]:
+                    best = i
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            back = self.level[learnt[1] >> 1]
+        return learnt, back
+
+    def _bump(self, v):
+        self.activity[v] += self.varInc
+        if self.activity[v] > 1e100:
+            for u in range(1, self.numVars+1):
+                self.activity[u] *= 1e-100
+            self.varInc *= 1e-100
+            self.order = [(-self.activity[u], u) for u in range(1, self.numVars+1) if self.value[2*u] == 0]
+            heapq.heapify(self.order)
+        elif self.value[2*v] == 0:
+            heapq.heappush(self.order, (-self.activity[v], v))
+
+    def _backtrack(self, level):
+        '''Undoes every assignment above level'''
+        if len(self.limits) <= level:
+            return
+        for i in range(len(self.trail)-1, self.limits[level]-1, -1):
+            lit = self.trail[i]
+            v = lit >> 1
+            self.value[lit] = 0
+            self.value[lit^1] = 0
+            self.reason[v] = None
+            self.phase[v] = lit & 1 == 0
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[self.limits[level]:]
+        del self.limits[level:]
+        self.qhead = len(self.trail)
+
+    def _pickBranch(self):
+        '''@return: unassigned variable with the highest activity, None if every variable is assigned'''
+        while len(self.order) > 0:
+            act, v = heapq.heappop(self.order)
+            if self.value[2*v] == 0 and act == -self.activity[v]:
+                return v
+        for v in range(1, self.numVars+1):
+            if self.value[2*v] == 0:
+                return v
+        return None
+
+    def _search(self, maxConflicts):
+        '''
+            @return: True/False when the clauses are proven satisfiable/unsatisfiable, None after maxConflicts conflicts (restart)
+        '''
+        conflicts = 0
+        steps = 0
+        while True:
+            steps += 1
+            if self.interrupt != None and steps % 256 == 0 and self.interrupt():
+                self.interrupted = True
+                self._backtrack(0)
+                return None
+            conflict = self._propagate()
+            if conflict != None:
+                self.conflicts += 1
+                conflicts += 1
+                if len(self.limits) == 0:
+                    self.ok = False
+                    return False
+                learnt, back = self._analyze(conflict)
+                self._backtrack(back)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._watch(learnt)
+                    self.learnts += 1
+                    self._enqueue(learnt[0], learnt)
+                self.varInc /= 0.95
+                continue
+
+            if conflicts >= maxConflicts:
+                self._backtrack(0)
+                return None
+            v = self._pickBranch()
+            if v == None:
+                return True
+            self.decisions += 1
+            self.limits.append(len(self.trail))
+            self._enqueue(2*v if self.phase[v] else 2*v + 1, None)
+
+def _luby(i):
+    '''@return: i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ...'''
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k-1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k-1)
@@ -0,0 +1,81 @@
+#Compiled Rules Class
+#An employee's availability & exclude rules turned into integer masks, so matching a shift needs no dictionary lookups
+
+ALL = -1 #mask with every bit set
+
+class CompiledRules:
+    '''
+        Same answers as walking the rules (see Employee.matchAvailability), computed from masks built once:
+            - days excluded for lunch and for dinner, bit d for day d, from every exclude rule
+            - for each availability rule: a lunch/dinner mask (bit 0 lunch, bit 1 dinner), a day mask (daynum rules),
+              a weekday mask (weekday rules), a weeknum mask (weeknum rules, or weekday rules restricted to some weeks)
+              and the earliest start in minutes. The masks a rule doesn't restrict have every bit set.
+        A shift is allowed if no exclude mask has its day and at least one rule has all its bits and starts at or before it.
+    '''
+
+    def __init__(self, rules):
+        '''
+            @params rules: list of Rule objects, maxshifts/maxshiftspw rules are ignored
+        '''
+        self.excludeLunch = 0
+        self.excludeDinner = 0
+        self.rules = [] #(lunch mask, day mask, weekday mask, weeknum mask, earliest start in minutes or None if the rule has no time)
+        for r in rules:
+            rule = r.rule
+            lunch = 3
+            if "lunch" in rule:
+                lunch = 1 if rule["lunch"] else 2
+
+            if "exclude" in rule:
+                days = self._mask(rule["exclude"])
+                if lunch & 1:
+                    self.excludeLunch |= days
+                if lunch & 2:
+                    self.excludeDinner |= days
+
+            days = ALL
+            weekdays = ALL
+            weeknums = ALL
+            if "daynum" in rule:
+                days = self._mask(rule["daynum"])
+            elif "weekday" in rule:
+                weekdays = self._mask(rule["weekday"])
+                if "weeknum" in rule:
+                    weeknums = self._mask(rule["weeknum"])
+            elif "weeknum" in rule:
+                weeknums = self._mask(rule["weeknum"])
+            else:
+                continue #lunch/time only, exclude or caps: allows nothing by itself
+
+            start = None
+            if "time" in rule:
+                start = rule["time"].hour*60 + rule["time"].minute
+            self.rules.append((lunch, days, weekdays, weeknums, start))
+
+    def _mask(self, values):
+        bits = 0
+        for v in values:
+            bits |= 1 << v
+        return bits
+
+    def match(self, lunch, time, weekday, weeknum, daynum):
+        '''
+            @params: see Employee.matchAvailability
+            @return: True if at least one rule allows the shift and no exclude rule forbids it, False otherwise
+        '''
+        if lunch:
+            if (self.excludeLunch >> daynum) & 1:
+                return False
+            shift = 1
+        else:
+            if (self.excludeDinner >> daynum) & 1:
+                return False
+            shift = 2
+        minutes = time.hour*60 + time.minute
+        for lunchBits, days, weekdays, weeknums, start in self.rules:
+            if lunchBits & shift and (days >> daynum) & 1 and (weekdays >> weekday) & 1 and (weeknums >> weeknum) & 1:
+                if start == None:
+                    raise KeyError("time") #same as looking up the missing time of the rule
+                if start <= minutes:
+                    return True
+        return False
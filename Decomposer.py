@@ -0,0 +1,120 @@
+#Decomposer Class
+#Splits the open shifts of a month into independent sub-problems and solves them in parallel processes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from Solver import Solver
+from Portfolio import _runConfig
+
+class Decomposer(Solver):
+    '''
+        An employee works at most one shift per day, so the shifts of a day always depend on each other, but two days only
+        depend on each other through the caps of an employee who can work on both:
+            - maxshifts links every day of the month the employee can work
+            - maxshiftspw links the days of a week the employee can work
+        The days are grouped with a union-find over those links, each group is solved by its own Solver in a worker process
+        and the schedules are stitched back together. Without any cap every day is its own group, with only maxshiftspw
+        groups never span more than a week, a single employee with a maxshifts cap can make the whole month one group.
+        Limits given to setLimits apply to each group (the node limit is per group), if some groups run out the
+        schedules of the others and the best partial schedules of those are written.
+    '''
+
+    def __init__(self, scheduler, options=None, workers=None):
+        '''
+            @params options: dictionary of Solver options used for every group, {} if None
+            @params workers: maximum number of processes, the number of cores if None
+        '''
+        Solver.__init__(self, scheduler)
+        self.options = options
+        if options == None:
+            self.options = {}
+        self.workers = workers
+        self.groups = 0 #number of independent groups of shifts of the last solve
+
+    def components(self):
+        '''
+            Loads the current calendar
+            @return: list of groups of open shifts which can be solved independently, in calendar order
+        '''
+        self._load()
+        return self._groups()
+
+    def _groups(self):
+        m = self.matrix
+        parent = {}
+        for dayNum in self.openByDay.keys():
+            parent[dayNum] = dayNum
+
+        def find(day):
+            while parent[day] != day:
+                parent[day] = parent[parent[day]]
+                day = parent[day]
+            return day
+
+        for e in range(0, m.numEmployees()):
+            if m.maxShifts[e] == None and m.maxShiftsPW[e] == None:
+                continue
+            first = {} #week (or 0 for the whole month) -> first day the employee can work in it
+            for s in self.open:
+                if (self.domains[s] >> e) & 1:
+                    key = 0
+                    if m.maxShifts[e] == None:
+                        key = m.shiftWeek[s]
+                    day = m.shiftDay[s]
+                    if key not in first:
+                        first[key] = day
+                    else:
+                        parent[find(day)] = find(first[key])
+
+        groups = {}
+        for s in self.open:
+            groups.setdefault(find(m.shiftDay[s]), []).append(s)
+        return [groups[root] for root in sorted(groups.keys(), key=lambda root: groups[root][0])]
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: ignored, kept for the same signature as Solver.solve
+            @return: True if found a complete schedule, False if not. Modifies the shiftcalendar in place
+        '''
+        matrix, fixed = self.getModel()
+        groups = self._groups()
+        self.groups = len(groups)
+        self.stopped = False
+        results = []
+        if len(groups) <= 1 or self.workers == 1:
+            for shifts in groups:
+                results.append(_runConfig(matrix, fixed, self.options, -1, self.stop, shifts, self.timeLeft(), self.nodeLimit))
+                if not results[-1][0]:
+                    break
+        else:
+            manager = multiprocessing.Manager()
+            stop = manager.Event()
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = set()
+                for shifts in groups:
+                    pending.add(pool.submit(_runConfig, matrix, fixed, self.options, -1, stop, shifts, self.timeLeft(), self.nodeLimit))
+                while len(pending) > 0:
+                    done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    if self.timeLeft() == 0 or (self.stop != None and self.stop.is_set()):
+                        stop.set() #deadline or cancelled by the caller, the groups left return their partial schedules
+                    for future in done:
+                        results.append(future.result())
+                    if len([res for res in results if not res[0] and not res[3]]) > 0:
+                        break #one group can't be filled, nor can the month
+                stop.set()
+                for future in pending:
+                    future.cancel()
+            manager.shutdown()
+
+        self.nodes = sum([res[2] for res in results])
+        if len([res for res in results if not res[0] and not res[3]]) > 0:
+            return False
+        self.stopped = len([res for res in results if res[3]]) > 0
+        index = {}
+        for i in range(0, len(self.employees)):
+            index[self.employees[i].getName()] = i
+        for res in results:
+            for s, name in res[1]:
+                self._assign(s, index[name])
+        self._write()
+        return not self.stopped
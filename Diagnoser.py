@@ -0,0 +1,174 @@
+#Diagnoser Class
+#Explains why a month can't be scheduled with a minimal set of conflicting constraints
+from Analyzer import Analyzer
+from Employee import Employee
+from Eligibility import bitIndexes
+
+class Diagnoser(Analyzer):
+    '''
+        Constraints of the month which can be relaxed:
+            - each empty shift must be filled
+            - each maxshifts/maxshiftspw rule of an employee
+            - each exclude rule of an employee
+            - the availability rules of an employee on a day, relaxed they can work every shift of that day
+        One shift a day and the shifts already assigned always hold.
+        A set of constraints is feasible if the exact flow network of the Analyzer fills all of its shifts.
+        QuickXplain (Junker 2004) then shrinks an infeasible set to a minimal conflict, dropping any one of its
+        constraints makes the others feasible, with O(k*log(n/k)) flow checks for a conflict of k out of n constraints.
+        The starting set is the shifts on the sink side of a minimum cut and the constraints touching them.
+        A month can have several conflicts, relaxing a constraint of the one found only solves that one.
+    '''
+
+    def __init__(self, scheduler):
+        Analyzer.__init__(self, scheduler)
+        self.checks = 0 #flow checks of the last diagnose
+        self.core = [] #constraints of the last diagnose, see _constraints
+
+    def diagnose(self):
+        '''
+            Loads the current calendar
+            @return: list of strings describing a minimal set of conflicting constraints, the shifts to fill first and one
+                     line per rule, empty if the calendar can be completed
+        '''
+        self._load()
+        self._prepare()
+        self.checks = 0
+        self.core = []
+        feasible, net, shiftNode = self._flow(self._constraints(self.open))
+        if feasible:
+            return []
+        sinkSide = self._sinkSide(net, 1)
+        shifts = [self.open[i] for i in range(0, len(self.open)) if shiftNode + i in sinkSide]
+        self.core = self._quickXplain([], False, self._constraints(shifts))
+        shifts = [c[1] for c in self.core if c[0] == "shift"]
+        res = ["These shifts must be filled: %s"%(self._names(sorted(shifts)))]
+        return res + [self._describe(c) for c in self.core if c[0] != "shift"]
+
+    def _prepare(self):
+        '''Splits each employee's availability into what the availability rules allow and what each exclude rule forbids'''
+        m = self.matrix
+        self.allowed = [] #allowed[e]: bitset of the shifts e's availability rules allow, exclusions ignored
+        self.excluded = {} #(e, rule index) -> bitset of the shifts that exclude rule forbids
+        self.working = [] #working[e]: bitset of the shifts on days e already works
+        for e in range(0, m.numEmployees()):
+            emp = self.employees[e]
+            rules = emp.getRules()
+            positive = Employee(emp.getName(), emp.getPriority())
+            for r in rules:
+                if "exclude" not in r.rule:
+                    positive.setRule(r)
+            allowed = 0
+            working = 0
+            for s in range(0, m.numShifts()):
+                shiftDay, lunch, time = self.shifts[s]
+                if positive.matchAvailability(lunch, time, shiftDay.weekday, shiftDay.weeknum, shiftDay.dayNum):
+                    allowed |= 1 << s
+                if (self.dayUsed[shiftDay.dayNum] >> e) & 1:
+                    working |= 1 << s
+            self.allowed.append(allowed)
+            self.working.append(working)
+            for i in range(0, len(rules)):
+                if "exclude" in rules[i].rule:
+                    bits = 0
+                    for s in range(0, m.numShifts()):
+                        shiftDay, lunch, time = self.shifts[s]
+                        if emp._matchLunchField(rules[i].rule, lunch) and shiftDay.dayNum in rules[i].rule["exclude"]:
+                            bits |= 1 << s
+                    self.excluded[(e, i)] = bits
+
+    def _constraints(self, shifts):
+        '''
+            @params shifts: list of the open shifts to fill
+            @return: list of the constraints which can take part in a conflict of those shifts, most important first:
+                     ("shift", s), ("maxshifts", e, rule index), ("maxshiftspw", e, rule index), ("exclude", e, rule index)
+                     and ("availability", e, dayNum)
+        '''
+        m = self.matrix
+        res = [("shift", s) for s in shifts]
+        bits = 0
+        for s in shifts:
+            bits |= 1 << s
+        unavailable = []
+        for e in range(0, m.numEmployees()):
+            rules = self.employees[e].getRules()
+            for i in range(0, len(rules)):
+                if "maxshifts" in rules[i].rule:
+                    res.append(("maxshifts", e, i))
+                elif "maxshiftspw" in rules[i].rule:
+                    res.append(("maxshiftspw", e, i))
+                elif "exclude" in rules[i].rule and self.excluded[(e, i)] & bits:
+                    res.append(("exclude", e, i))
+            days = set()
+            for s in bitIndexes(bits & ~self.allowed[e] & ~self.working[e]):
+                days.add(m.shiftDay[s])
+            for dayNum in sorted(days):
+                unavailable.append(("availability", e, dayNum))
+        return res + unavailable
+
+    def _flow(self, constraints):
+        '''
+            @params constraints: list of the constraints which hold, the others are relaxed
+            @return: (True if every shift of constraints can be filled, flow network, its first shift node)
+        '''
+        m = self.matrix
+        self.checks += 1
+        numEmps = m.numEmployees()
+        shifts = []
+        maxShifts = [None]*numEmps
+        maxShiftsPW = [None]*numEmps
+        forbidden = [0]*numEmps
+        unavailable = set()
+        for c in constraints:
+            if c[0] == "shift":
+                shifts.append(c[1])
+            elif c[0] == "maxshifts" or c[0] == "maxshiftspw":
+                caps = maxShifts if c[0] == "maxshifts" else maxShiftsPW
+                cap = self.employees[c[1]].getRule(c[2]).rule[c[0]]
+                if caps[c[1]] == None or cap < caps[c[1]]:
+                    caps[c[1]] = cap
+            elif c[0] == "exclude":
+                forbidden[c[1]] |= self.excluded[(c[1], c[2])]
+            else:
+                unavailable.add((c[1], c[2]))
+        shifts.sort()
+
+        domains = [0]*m.numShifts()
+        for s in shifts:
+            for e in range(0, numEmps):
+                if (self.allowed[e] >> s) & 1 or (e, m.shiftDay[s]) not in unavailable:
+                    if not ((forbidden[e] | self.working[e]) >> s) & 1:
+                        domains[s] |= 1 << e
+        net, cuts, dayNode, shiftNode, days = self._network(shifts, domains, maxShifts, maxShiftsPW)
+        flow, cost = net.run(0, 1)
+        return flow == len(shifts), net, shiftNode
+
+    def _quickXplain(self, background, checkBackground, constraints):
+        '''
+            @params background: list of constraints which hold
+            @params checkBackground: T/F whether constraints were added to background since it was last checked
+            @params constraints: list of constraints which, with background, can't all hold
+            @return: minimal list of constraints which can't hold with background
+        '''
+        if checkBackground and not self._flow(background)[0]:
+            return []
+        if len(constraints) == 1:
+            return constraints
+        half = len(constraints)//2
+        first = constraints[:half]
+        second = constraints[half:]
+        coreSecond = self._quickXplain(background + first, len(first) > 0, second)
+        coreFirst = self._quickXplain(background + coreSecond, len(coreSecond) > 0, first)
+        return coreFirst + coreSecond
+
+    def _describe(self, c):
+        '''@return: readable description of the rule constraint c'''
+        emp = self.employees[c[1]]
+        if c[0] == "availability":
+            shifts = [s for s in self.openByDay[c[2]] if not (self.allowed[c[1]] >> s) & 1]
+            return "%s isn't available for %s"%(emp.getName(), self._names(shifts))
+        rule = emp.getRule(c[2]).rule
+        if c[0] == "maxshifts":
+            return "%s rule %d: at most %d shifts a month (maxshifts)"%(emp.getName(), c[2] + 1, rule["maxshifts"])
+        if c[0] == "maxshiftspw":
+            return "%s rule %d: at most %d shifts a week (maxshiftspw)"%(emp.getName(), c[2] + 1, rule["maxshiftspw"])
+        return "%s rule %d: excluded from days %s"%(emp.getName(), c[2] + 1, ", ".join([str(d) for d in rule["exclude"]]))
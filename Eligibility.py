@@ -0,0 +1,137 @@
+#Eligibility Matrix Class
+#Static availability of every employee for every shift of a ShiftCalendar, built once per solve
+
+def popcount(bits):
+    '''@return: number of bits set in the integer bits'''
+    return bin(bits).count("1")
+
+def bitIndexes(bits):
+    '''@return: list of the positions of the bits set in the integer bits, lowest first'''
+    res = []
+    i = 0
+    while bits:
+        if bits & 1:
+            res.append(i)
+        bits >>= 1
+        i += 1
+    return res
+
+class RuleCache:
+    '''
+        Remembers the matchAvailability results of employees, so the EligibilityMatrix of several calendars (months,
+        restaurants) which share employees evaluates the rules of each of them once per distinct shift.
+        Employees are told apart by name and rules: the same person with other rules at another site gets their own entry.
+        Shifts are told apart by (lunch, time, weekday, weeknum, daynum), everything the rules can look at.
+        Only used within one process.
+    '''
+
+    def __init__(self):
+        self.results = {} #(name, rules) -> {(lunch, hour, minute, weekday, weeknum, daynum) -> True/False}
+        self.hits = 0
+        self.misses = 0
+
+    def employeeResults(self, employee):
+        '''@return: dictionary of the results of employee, shared by every employee with the same name and rules'''
+        rules = []
+        for r in employee.getRules():
+            rules.append(tuple([(key, str(r.rule[key])) for key in sorted(r.rule.keys())]))
+        return self.results.setdefault((employee.getName(), tuple(rules)), {})
+
+    def matchAvailability(self, employee, results, lunch, time, weekday, weeknum, daynum):
+        '''
+            @params results: dictionary given by employeeResults for employee
+            @return: employee.matchAvailability for that shift, evaluated only the first time
+        '''
+        key = (lunch, time.hour, time.minute, weekday, weeknum, daynum)
+        if key in results:
+            self.hits += 1
+            return results[key]
+        self.misses += 1
+        res = employee.matchAvailability(lunch, time, weekday, weeknum, daynum)
+        results[key] = res
+        return res
+
+class EligibilityMatrix:
+    '''
+        Evaluates each employee's availability & exclude rules once against every shift of the calendar.
+        Rows are stored as python integers used as bitsets:
+            eligible[s] has bit i set if employees[i] can work shift s
+            available[i] has bit s set if employees[i] can work shift s
+        maxshifts/maxshiftspw caps are not part of the matrix, they depend on live counters and are
+        kept in maxShifts/maxShiftsPW (None means no cap) for the solver to check.
+        Only plain data is stored so the matrix can be pickled.
+    '''
+
+    def __init__(self, cal, employees, cache=None, index=None):
+        '''
+            @params cal: ShiftCalendar object
+            @params employees: list of Employee objects, their position in the list is their index in the matrix
+            @params cache: RuleCache shared with other matrices, None evaluates every rule
+            @params index: AvailabilityIndex, the employees it contains are read from it instead of evaluating their rules
+        '''
+        self.names = [e.getName() for e in employees]
+        self.priorities = [e.getPriority() for e in employees]
+        self.maxShifts = [e.getMaxShifts() for e in employees]
+        self.maxShiftsPW = [e.getMaxShiftsPW() for e in employees]
+
+        #one entry per shift in calendar order (day, lunch before dinner, earliest first)
+        self.shiftDay = [] #day number (1-31)
+        self.shiftWeek = [] #week number (1-6)
+        self.shiftLunch = [] #True for lunch shifts
+        self.shiftTime = [] #(hour, minute)
+
+        self.eligible = []
+        self.available = [0]*len(employees)
+        results = None
+        if cache != None:
+            results = [cache.employeeResults(e) for e in employees]
+        position = {} #id of the indexed employees -> index in the matrix
+        unindexed = range(0, len(employees))
+        if index != None:
+            for i in range(0, len(employees)):
+                if index.contains(employees[i]):
+                    position[id(employees[i])] = i
+            unindexed = [i for i in range(0, len(employees)) if id(employees[i]) not in position]
+
+        for shiftDay in cal.days:
+            times = shiftDay.getAllShifts()
+            for lunch, shiftTimes in ((True, times[0]), (False, times[1])):
+                for t in shiftTimes:
+                    s = len(self.eligible)
+                    bits = 0
+                    if len(position) > 0:
+                        for emp in index.eligible(lunch, t, shiftDay.weekday, shiftDay.weeknum, shiftDay.dayNum):
+                            if id(emp) in position:
+                                bits |= 1 << position[id(emp)]
+                    for i in unindexed:
+                        if cache != None:
+                            allowed = cache.matchAvailability(employees[i], results[i], lunch, t, shiftDay.weekday, shiftDay.weeknum, shiftDay.dayNum)
+                        else:
+                            allowed = employees[i].matchAvailability(lunch, t, shiftDay.weekday, shiftDay.weeknum, shiftDay.dayNum)
+                        if allowed:
+                            bits |= 1 << i
+                    for i in bitIndexes(bits):
+                        self.available[i] |= 1 << s
+                    self.eligible.append(bits)
+                    self.shiftDay.append(shiftDay.dayNum)
+                    self.shiftWeek.append(shiftDay.weeknum)
+                    self.shiftLunch.append(lunch)
+                    self.shiftTime.append((t.hour, t.minute))
+
+    def numShifts(self):
+        return len(self.eligible)
+
+    def numEmployees(self):
+        return len(self.names)
+
+    def isEligible(self, emp, shift):
+        '''
+            @params emp: index of the employee
+            @params shift: index of the shift
+            @return: True if the employee's rules allow that shift
+        '''
+        return (self.eligible[shift] >> emp) & 1 == 1
+
+    def candidates(self, shift):
+        '''@return: list of indexes of the employees who can work shift, in index order'''
+        return bitIndexes(self.eligible[shift])
@@ -1,11 +1,15 @@
 #Employee class
 import pickle
+from collections import OrderedDict
 
-from Time import Time
 from Rule import Rule
+from CompiledRules import CompiledRules
+from ShiftCounters import ShiftCounters, MAX_WEEKS
 
 class Employee:
 
+	matchCacheSize = 512 #most shifts whose availability canWork remembers per employee, the least recently used are dropped
+
 	def __init__(self, name, priority):
 		'''
 			@param name: String name of the employee
@@ -14,8 +18,12 @@ class Employee:
 		self.name = name
 		self.priority = priority
 		self.rules = []
-		self.curShifts = 0 #how many shifts an employee has
-		self.shiftsPerWeek=[0,0,0,0,0] #counts num shifts per week
+		self.compiled = CompiledRules(self.rules) #masks of the rules used by matchAvailability, rebuilt when rules change
+		self.listeners = [] #functions called with this employee when their rules change
+		self.matchCache = OrderedDict() #(lunch, hour, minute, weekday, weeknum, daynum) -> matchAvailability, least recently used first
+		self.matchLookups = 0 #shifts canWork looked up in matchCache
+		self.matchMisses = 0 #of those, the ones it didn't remember
+		self.counters = ShiftCounters() #how many shifts the employee has in the month and each week, with their caps
 
 	def save(self, file, info=False):
 		'''
@@ -26,8 +34,8 @@ class Employee:
 		print("  Saving data for %s..."%(self.name))
 		pickle.dump(self.name, file)
 		pickle.dump(self.priority, file)
-		pickle.dump(self.curShifts, file)
-		pickle.dump(self.shiftsPerWeek, file)
+		pickle.dump(self.counters.total, file)
+		pickle.dump(self.counters.weeks, file)
 		if info: print("    Saved employee attributes")
 		pickle.dump(len(self.rules), file)
 		if info: print("    %d rules to save"%len(self.rules))
@@ -50,15 +58,17 @@ class Employee:
 			print("  Loading data for %s..."%self.name)
 			self.priority = pickle.load(file)
 			if info: print("    Read priority: %d"%self.priority)
-			self.curShifts = pickle.load(file)
-			if info: print("    Read number of shifts: %d"%self.curShifts)
-			self.shiftsPerWeek = pickle.load(file)
-			if info: print("    Read shifts per week: %s"%self.shiftsPerWeek)
+			self.counters.total = pickle.load(file)
+			if info: print("    Read number of shifts: %d"%self.counters.total)
+			self.counters.weeks = pickle.load(file)
+			self.counters.resize(MAX_WEEKS) #files saved while the counts could shrink may hold fewer weeks
+			if info: print("    Read shifts per week: %s"%self.counters.weeks)
 			numRules = pickle.load(file)
 			if info: print("    Read number of rules: %d"%numRules)
 
 			print("    %d rules to load"%numRules)
 			self.rules = []
+			self._rulesChanged()
 			num = 0
 			for i in range(0,numRules):
 				r = Rule()
@@ -82,6 +92,7 @@ class Employee:
 		'''
 		if rule.__class__.__name__ == "Rule":
 			self.rules.append(rule)
+			self._rulesChanged()
 
 	def getRules(self):
 		'''
@@ -104,9 +115,31 @@ class Employee:
 		for r in self.rules:
 			if mrule == r:
 				self.rules.remove(r)
+				self._rulesChanged()
 				return 1
 		return -1
 
+	def addListener(self, listener):
+		'''
+			@params listener: function called with this employee each time a rule is added or deleted (see AvailabilityIndex)
+		'''
+		self.listeners.append(listener)
+
+	def removeListener(self, listener):
+		if listener in self.listeners:
+			self.listeners.remove(listener)
+
+	def _rulesChanged(self):
+		'''
+			helper function to recompile the rules and the caps, forget the shifts canWork remembers and tell the listeners
+		'''
+		self.compiled = CompiledRules(self.rules)
+		self.matchCache.clear()
+		self.counters.maxShifts = self._lowestCap("maxshifts")
+		self.counters.maxShiftsPW = self._lowestCap("maxshiftspw")
+		for listener in list(self.listeners):
+			listener(self)
+
 	def matchRule(self, shiftRule):
 		'''
 			Given keyword arguments as in Rule class it determines if employee's stored rules match this rule
@@ -137,131 +170,83 @@ class Employee:
 
 		assert len(matchRule) == 5, "Shift Rule must be complete"
 
-		lunch = matchRule["lunch"]
-		allowed = False #match occurs if atleast 1 rule fits
-		
-		for r in self.rules:
-			print("Allowed? %s"%allowed)
-			print("curRule:\n%s"%r)
-			emp_rule = r.rule
-
-			if "maxshifts" in emp_rule:
-				if ((self.curShifts+1)<=emp_rule["maxshifts"]) == False:
-					print("Already at MaxShifts")
-					return False
-				else:
-					continue
+		allowed = self.canWork(matchRule["lunch"], matchRule["time"], matchRule["weekday"][0], matchRule["weeknum"][0], matchRule["daynum"][0])
 
-			if "maxshifspw" in emp_rule:
-				cur_weeknum = matchRule["weekday"]
-				if (self.shiftPerWeek[cur_weeknum-1]+1) >= emp_rule["maxshiftspw"]:
-					print("Already max shifts for this week")
-					return False
-				else:
-					continue
-
-			if "exclude" in emp_rule:
-				if self._matchLunchField(emp_rule, lunch):
-					if matchRule["daynum"][0] in emp_rule["exclude"]:
-						#daynum specified is excluded so return False
-						return False
-
-
-			if "daynum" in emp_rule: #means rule should have fields lunch (optional), time, daynum only dont take into account anything else
-				# assert len(rule) == 3, "Rule has invalid format"
-
-				if self._matchLunchField(emp_rule, lunch): # matches lunch fields in both rules
-					print("Matched lunch field")
-
-					if matchRule["daynum"][0] in emp_rule["daynum"]:
-						print("daynum matched")
-						
-						if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
-							allowed = True
-						else:
-							print("time match failed")
-							# print(type(emp_rule["time"]))
-							# print(type(matchRule["time"]))
-							# print("x <= y: %s"%(emp_rule["time"] <= matchRule["time"]))
-							# print(emp_rule["time"])
-							# print(matchRule["time"])
-						
-					else:
-						print("daynum failed")
-						# print(type(matchRule["daynum"]))
-						continue
-
-				else: #doesnt match lunch field
-					print("lunch field match failed, skipping rule")
-					continue
-
-			elif "weekday" in emp_rule: #rule will match with fields lunch(optional), time, weekday, weeknum(optional)
-
-				if self._matchLunchField(emp_rule, lunch):
-					print("Matched lunch field")
-
-					if matchRule["weekday"][0] in emp_rule["weekday"]:
-						print("Weekday match")
-
-						if ("weeknum" in emp_rule):
-							if matchRule["weeknum"][0] in emp_rule["weeknum"]:
-								print("employee rule has weeknum field and it matches")
-								if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
-									allowed = True
-
-							else:
-								print("employee rule has weeknum field but it doesnt match")
-								continue
-
-						else:
-							print("employee rule does not have weeknum field")
-							if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
-								allowed = True
-
-					else:
-						print("Weekday mismatch")
-						continue
-
-				else:
-					print("lunch field match failed, skipping rule")
-					continue
-
-			elif "weeknum" in emp_rule: #rule will match with lunch (optional) , time, weekday(optional)
-				
-				if self._matchLunchField(emp_rule, lunch):
-					print("Matched lunch field")
-
-					if matchRule["weeknum"][0] in emp_rule["weeknum"]:
-						print("Weeknum match")
-
-						if ("weekday" in emp_rule):
-							if matchRule["weekday"][0] in emp_rule["weekday"]:
-								print("employee rule has weekday field and it matches")
-								if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
-									allowed = True
-
-							else:
-								print("employee rule has weekday field but it doesnt match")
-								continue
-
-						else:
-							print("employee rule does not have weekday field")
-							if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
-								allowed = True
-
-					else:
-						print("Weekday mismatch")
-						continue
-
-				else:
-					print("lunch field match failed, skipping rule")
-					continue 
+		print("Done matching employee %s, allowed = %s"%(self.name, allowed))
+		return allowed
 
-			print("")
+	def _matchCaps(self, weeknum):
+		'''
+			helper function to check maxshifts/maxshiftspw rules against the employee's current shift counts
+			@params weeknum: 1-6, week of the shift
+			@return: False if one more shift would go over a cap, True otherwise
+		'''
+		if self.counters.monthFull():
+			print("Already at MaxShifts")
+			return False
+		if self.counters.weekFull(weeknum):
+			print("Already max shifts for this week")
+			return False
+		return True
 
-		print("Done matching employee %s, allowed = %s"%(self.name, allowed))
+	def canWork(self, lunch, time, weekday, weeknum, daynum):
+		'''
+			matchRule without building a Rule: checks the caps against the shift counts (O(1), see ShiftCounters.py)
+			then the availability & exclude rules (see matchAvailability), remembered for the last matchCacheSize shifts
+			until a rule is added, deleted or loaded. The caps depend on the shift counts, they are never remembered
+			@params: see matchAvailability
+			@return: True if the employee can work one more shift at that time, False otherwise
+		'''
+		if not self._matchCaps(weeknum):
+			return False
+		self.matchLookups += 1
+		key = (lunch, time.hour, time.minute, weekday, weeknum, daynum)
+		if key in self.matchCache:
+			self.matchCache.move_to_end(key)
+			return self.matchCache[key]
+		self.matchMisses += 1
+		allowed = self.matchAvailability(lunch, time, weekday, weeknum, daynum)
+		self.matchCache[key] = allowed
+		if len(self.matchCache) > self.matchCacheSize:
+			self.matchCache.popitem(last=False)
 		return allowed
 
+	def matchAvailability(self, lunch, time, weekday, weeknum, daynum):
+		'''
+			Static part of matchRule: checks availability & exclude rules only, ignores maxshifts caps and prints nothing
+			Uses the masks compiled from the rules, see CompiledRules.py
+			@params lunch: True if this is a lunch shift False if this is a dinner shift
+			@params time: Time object, hour at which shift starts
+			@params weekday: 0-6 indicating which day of the week, 0=Monday, 6=Sunday
+			@params weeknum: 1-6, which week of the month the shift is in
+			@params daynum: 1-31, day of the month
+
+			@return: True if atleast one rule allows the shift and no exclude rule forbids it, False otherwise
+		'''
+		return self.compiled.match(lunch, time, weekday, weeknum, daynum)
+
+	def getMaxShifts(self):
+		'''
+			@return: the lowest maxshifts value among the employee's rules, None if there is no maxshifts rule
+		'''
+		return self.counters.maxShifts
+
+	def getMaxShiftsPW(self):
+		'''
+			@return: the lowest maxshiftspw value among the employee's rules, None if there is no maxshiftspw rule
+		'''
+		return self.counters.maxShiftsPW
+
+	def _lowestCap(self, key):
+		'''
+			helper function to find the lowest value of the maxshifts or maxshiftspw rules, None if there is none
+		'''
+		cap = None
+		for r in self.rules:
+			if key in r.rule and (cap == None or r.rule[key] < cap):
+				cap = r.rule[key]
+		return cap
+
 	def _matchLunchField(self, emp_rule, matchLunch):
 		'''
 			helper function to match optional lunch field if it is present in employee's rule
@@ -292,18 +277,26 @@ class Employee:
 		return self.name
 
 	def curNumShifts(self):
-		return self.curShifts
+		return self.counters.total
+
+	@property
+	def curShifts(self):
+		'''Read-only, how many shifts the employee has (kept by counters)'''
+		return self.counters.total
+
+	@property
+	def shiftsPerWeek(self):
+		'''Read-only, copy of the shifts of each week, shiftsPerWeek[w-1] counts week w (kept by counters)'''
+		return list(self.counters.weeks)
 
 	def addShift(self, weeknum):
 		'''
-			Increases curShifts
+			Increases the shift counts of the month and of week weeknum
 		'''
-		self.curShifts += 1
-		self.shiftsPerWeek[weeknum-1] += 1
+		self.counters.add(weeknum)
 
 	def removeShift(self, weeknum):
-		self.curShifts -= 1
-		self.shiftsPerWeek[weeknum-1] -= 1
+		self.counters.remove(weeknum)
 
 	def __lt__(self, other):
 		if other.__class__.__name__ != "Employee":
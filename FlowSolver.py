@@ -0,0 +1,40 @@
+#Flow Solver Class
+#Solves a month as a min-cost flow problem, no backtracking needed
+from Analyzer import Analyzer
+
+class FlowSolver(Analyzer):
+    '''
+        Alternative backend, the month is a flow network:
+            source -> employee (capacity = shifts left before maxshifts)
+            employee -> employee's week (capacity = shifts left that week before maxshiftspw)
+            employee's week -> employee's day (capacity 1, one shift per day)
+            employee's day -> shift (capacity 1, cost = Employee.priority minus the lowest one, only if the employee can work it)
+            shift -> sink (capacity 1)
+        The caps are nested (day in week in month), so every integer flow is a schedule and every schedule a flow:
+        a min-cost max flow fills every open shift if that is possible at all, preferring employees with a
+        better (lower) priority, in polynomial time. It is the network Analyzer._network builds to check feasibility.
+        Priorities are shifted to be non negative as MinCostFlow needs, if they aren't all integers every employee costs the same.
+    '''
+
+    def __init__(self, scheduler):
+        Analyzer.__init__(self, scheduler)
+        self.cost = 0 #sum of the priorities of the employees assigned by the last solve
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: ignored, kept for the same signature as Solver.solve
+            @return: True if every open shift could be filled, False if not. Modifies the shiftcalendar in place
+        '''
+        self._load()
+        m = self.matrix
+        net, cuts, dayNode, shiftNode, days = self._network(self.open, self.domains, m.maxShifts, m.maxShiftsPW, self._priorityCosts())
+        flow, cost = net.run(0, 1)
+        self.nodes = 0
+        self.cost = 0
+        if flow < len(self.open):
+            return False
+
+        self._assignFlow(self.open, cuts, dayNode, shiftNode, days)
+        self.cost = sum([m.priorities[self.assignment[s]] for s in self.open])
+        self._write()
+        return True
@@ -0,0 +1,235 @@
+#Local Search Solver Class
+#Anytime solver: fills every shift greedily then repairs the broken rules with min-conflicts moves & simulated annealing
+import math
+import random
+import time
+
+from Solver import Solver
+
+class LocalSolver(Solver):
+    '''
+        Every open shift always has an employee who is available for it, the solver moves employees around until
+        no one works twice a day or goes over their maxshifts/maxshiftspw caps. Violations:
+            - each extra shift of an employee on the same day
+            - each shift over maxshifts in the month or over maxshiftspw in a week
+            - each open shift no employee is available for (can't be repaired)
+        Moves are reassigning a shift to another employee or swapping the employees of two shifts. Counters per
+        employee & day/week/month make the violation delta of a move O(1): the move is applied, the counters tell
+        how many violations it added or removed, and it is undone if rejected.
+        Each step picks a shift involved in a violation and either does the best reassignment for it (min-conflicts)
+        or tries a random swap, worse moves are accepted with probability exp(-delta/temperature) while the
+        temperature cools down over the time budget. The best schedule seen is kept.
+    '''
+
+    def __init__(self, scheduler, timeLimit=0.2, seed=None):
+        '''
+            @params timeLimit: seconds to search for
+            @params seed: seed of the random generator, None for a different run each time
+        '''
+        Solver.__init__(self, scheduler)
+        self.timeLimit = timeLimit
+        self.random = random.Random(seed)
+        self.violations = 0 #violations left in the schedule written by the last solve
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: ignored, kept for the same signature as Solver.solve
+            @return: True if the best schedule found breaks no rule. The best schedule is written to the
+                     shiftcalendar even if it still has violations, see self.violations. self.stopped is set if the time
+                     budget (or a limit given to setLimits) ran out before every rule could be satisfied
+        '''
+        start = time.perf_counter()
+        self._load()
+        m = self.matrix
+        self.dayCount = [{} for e in range(0, m.numEmployees())] #dayCount[emp][dayNum]: shifts that day
+        for s in range(0, m.numShifts()):
+            e = self.assignment[s]
+            if e != None:
+                self.dayCount[e][m.shiftDay[s]] = self.dayCount[e].get(m.shiftDay[s], 0) + 1
+        self.choices = {} #open shift -> employees available for it
+        self.shiftsOf = [[] for e in range(0, m.numEmployees())] #emp -> open shifts they are available for
+        for s in self.open:
+            self.choices[s] = m.candidates(s)
+            for e in self.choices[s]:
+                self.shiftsOf[e].append(s)
+        self.violations = self._countViolations()
+        self._greedy()
+
+        best = list(self.assignment)
+        bestViolations = self.violations
+        conflicted = []
+        self.nodes = 0
+        temperature = 1.0
+        while self.violations > 0:
+            if self.nodes % 64 == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= self.timeLimit or self._outOfBudget():
+                    break
+                temperature = max(0.05, 1.0 - elapsed/self.timeLimit)
+            self.nodes += 1
+
+            if len(conflicted) == 0:
+                conflicted = [s for s in self.open if self._isConflicted(s)]
+                if len(conflicted) == 0:
+                    break #only shifts nobody can work are left
+            i = self.random.randrange(len(conflicted))
+            s = conflicted[i]
+            if not self._isConflicted(s):
+                conflicted[i] = conflicted[-1]
+                conflicted.pop()
+                continue
+
+            if self.random.random() < 0.5:
+                moved = self._minConflicts(s, temperature)
+            else:
+                moved = self._randomSwap(s, temperature)
+            conflicted.extend(moved)
+
+            if self.violations < bestViolations:
+                best = list(self.assignment)
+                bestViolations = self.violations
+
+        self.assignment = best
+        self.violations = bestViolations
+        unfillable = len([s for s in self.open if len(self.choices[s]) == 0])
+        self.stopped = self.violations > unfillable
+        self._write()
+        return self.violations == 0
+
+    def _greedy(self):
+        '''Gives every open shift, in calendar order, the employee adding the fewest violations, then the best priority'''
+        m = self.matrix
+        for s in self.open:
+            if len(self.choices[s]) == 0:
+                continue
+            bestKey = None
+            for e in self.choices[s]:
+                delta = self._move(s, e)
+                self._move(s, None)
+                key = (delta, m.priorities[e], self.monthCount[e], e)
+                if bestKey == None or key < bestKey:
+                    bestKey = key
+            self._move(s, bestKey[3])
+
+    def _minConflicts(self, s, temperature):
+        '''
+            Reassigns shift s to the employee with the lowest delta, ties broken randomly
+            @return: shifts changed
+        '''
+        old = self.assignment[s]
+        bestDelta = None
+        best = []
+        for e in self.choices[s]:
+            if e == old:
+                continue
+            delta = self._move(s, e)
+            self._move(s, old)
+            if bestDelta == None or delta < bestDelta:
+                bestDelta = delta
+                best = [e]
+            elif delta == bestDelta:
+                best.append(e)
+        if len(best) == 0 or not self._accept(bestDelta, temperature):
+            return []
+        self._move(s, self.random.choice(best))
+        return [s]
+
+    def _randomSwap(self, s, temperature):
+        '''
+            Swaps the employees of shift s and of a random shift the employee of s is available for
+            @return: shifts changed
+        '''
+        a = self.assignment[s]
+        t = self.random.choice(self.shiftsOf[a])
+        b = self.assignment[t]
+        if t == s or b == None or b == a or not self.matrix.isEligible(b, s):
+            return []
+        delta = self._move(s, None)
+        delta += self._move(t, a)
+        delta += self._move(s, b)
+        if self._accept(delta, temperature):
+            return [s, t]
+        self._move(s, None)
+        self._move(t, b)
+        self._move(s, a)
+        return []
+
+    def _accept(self, delta, temperature):
+        return delta <= 0 or self.random.random() < math.exp(-delta/temperature)
+
+    def _move(self, s, e):
+        '''
+            Gives shift s to employee e (None empties it) and updates the counters
+            @return: change in the number of violations
+        '''
+        m = self.matrix
+        day = m.shiftDay[s]
+        week = m.shiftWeek[s]
+        change = 0
+        old = self.assignment[s]
+        if old != None:
+            count = self.dayCount[old][day]
+            self.dayCount[old][day] = count - 1
+            if count > 1:
+                change -= 1
+            cap = m.maxShifts[old]
+            if cap != None and self.monthCount[old] > cap:
+                change -= 1
+            self.monthCount[old] -= 1
+            cap = m.maxShiftsPW[old]
+            if cap != None and self.weekCount[old][week] > cap:
+                change -= 1
+            self.weekCount[old][week] -= 1
+        else:
+            change -= 1 #an empty shift is a violation
+        self.assignment[s] = e
+        if e != None:
+            count = self.dayCount[e].get(day, 0)
+            self.dayCount[e][day] = count + 1
+            if count > 0:
+                change += 1
+            cap = m.maxShifts[e]
+            if cap != None and self.monthCount[e] >= cap:
+                change += 1
+            self.monthCount[e] += 1
+            cap = m.maxShiftsPW[e]
+            if cap != None and self.weekCount[e][week] >= cap:
+                change += 1
+            self.weekCount[e][week] += 1
+        else:
+            change += 1
+        self.violations += change
+        return change
+
+    def _isConflicted(self, s):
+        '''@return: True if the employee of shift s breaks a rule by working it'''
+        m = self.matrix
+        e = self.assignment[s]
+        if e == None:
+            return False
+        if self.dayCount[e][m.shiftDay[s]] > 1:
+            return True
+        cap = m.maxShifts[e]
+        if cap != None and self.monthCount[e] > cap:
+            return True
+        cap = m.maxShiftsPW[e]
+        if cap != None and self.weekCount[e][m.shiftWeek[s]] > cap:
+            return True
+        return False
+
+    def _countViolations(self):
+        '''@return: violations of the current assignment, counted from scratch'''
+        m = self.matrix
+        count = 0
+        for s in self.open:
+            if self.assignment[s] == None:
+                count += 1
+        for e in range(0, m.numEmployees()):
+            for day in self.dayCount[e].keys():
+                count += max(0, self.dayCount[e][day] - 1)
+            if m.maxShifts[e] != None:
+                count += max(0, self.monthCount[e] - m.maxShifts[e])
+            if m.maxShiftsPW[e] != None:
+                for week in range(0, len(self.weekCount[e])):
+                    count += max(0, self.weekCount[e][week] - m.maxShiftsPW[e])
+        return count
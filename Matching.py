@@ -0,0 +1,79 @@
+#Bipartite Matching
+#Hopcroft-Karp maximum matching, used to check that the open shifts of a day can all get a different employee
+
+INF = float("inf")
+
+def hopcroftKarp(adj, numRight):
+    '''
+        Maximum matching of a bipartite graph
+        @params adj: list, adj[u] is the list of right vertices (0 to numRight-1) that left vertex u can be matched with
+        @params numRight: number of right vertices
+
+        @return: (size, matchLeft) where matchLeft[u] is the right vertex matched with u or -1
+    '''
+    n = len(adj)
+    matchLeft = [-1]*n
+    matchRight = [-1]*numRight
+    dist = [0]*n
+    size = 0
+
+    while _layer(adj, matchLeft, matchRight, dist):
+        for u in range(0, n):
+            if matchLeft[u] == -1 and _augment(u, adj, matchLeft, matchRight, dist):
+                size += 1
+    return size, matchLeft
+
+def _layer(adj, matchLeft, matchRight, dist):
+    '''
+        BFS from the free left vertices, sets dist[u] to the length of the shortest alternating path reaching u
+        @return: True if an augmenting path exists
+    '''
+    queue = []
+    for u in range(0, len(adj)):
+        if matchLeft[u] == -1:
+            dist[u] = 0
+            queue.append(u)
+        else:
+            dist[u] = INF
+
+    found = False
+    i = 0
+    while i < len(queue):
+        u = queue[i]
+        i += 1
+        for v in adj[u]:
+            w = matchRight[v]
+            if w == -1:
+                found = True
+            elif dist[w] == INF:
+                dist[w] = dist[u] + 1
+                queue.append(w)
+    return found
+
+def _augment(root, adj, matchLeft, matchRight, dist):
+    '''
+        Iterative DFS along the BFS layers for an augmenting path starting at the free left vertex root, flips it if found
+        @return: True if the matching was augmented
+    '''
+    stack = [[root, 0]] #[left vertex, index of the next edge to try]
+    while len(stack) > 0:
+        top = stack[-1]
+        u = top[0]
+        if top[1] == len(adj[u]):
+            dist[u] = INF #dead end, don't visit again during this phase
+            stack.pop()
+            continue
+
+        v = adj[u][top[1]]
+        top[1] += 1
+        w = matchRight[v]
+        if w == -1:
+            #every vertex on the stack takes the edge it is exploring
+            for u, i in stack:
+                v = adj[u][i-1]
+                matchLeft[u] = v
+                matchRight[v] = u
+            return True
+        if dist[w] == dist[u] + 1:
+            stack.append([w, 0])
+    return False
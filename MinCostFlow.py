@@ -0,0 +1,120 @@
+#Min Cost Flow Class
+#Min-cost max-flow used by the flow engine, the Analyzer and the Optimizer
+import heapq
+
+INF = float("inf")
+
+class MinCostFlow:
+    '''
+        Min-cost max-flow on a directed graph with integer capacities and non negative costs
+        Primal-dual: Dijkstra with node potentials finds the cheapest augmenting paths, then every path of that
+        cost is saturated at once with Dinic's blocking flow on the zero reduced cost edges.
+    '''
+
+    def __init__(self, numNodes):
+        self.numNodes = numNodes
+        self.graph = [[] for i in range(0, numNodes)] #graph[u] = list of edges [to, capacity, cost, index of reverse edge in graph[to]]
+
+    def addEdge(self, u, v, capacity, cost):
+        '''
+            Adds an edge u -> v and its residual edge v -> u
+            @return: the edge, edge[1] is its remaining capacity once run is done
+        '''
+        edge = [v, capacity, cost, len(self.graph[v])]
+        self.graph[u].append(edge)
+        self.graph[v].append([u, 0, -cost, len(self.graph[u])-1])
+        return edge
+
+    def run(self, source, sink):
+        '''
+            Pushes as much flow as possible from source to sink at the lowest cost
+            @return: (flow, cost)
+        '''
+        potential = [0]*self.numNodes
+        flow = 0
+        cost = 0
+        while True:
+            dist = self._shortestPaths(source, potential)
+            if dist[sink] == INF:
+                break
+            for u in range(0, self.numNodes):
+                if dist[u] != INF:
+                    potential[u] += dist[u]
+            pushed = self._blockingFlow(source, sink, potential)
+            flow += pushed
+            cost += pushed * (potential[sink] - potential[source])
+        return flow, cost
+
+    def _shortestPaths(self, source, potential):
+        '''Dijkstra on reduced costs cost + potential[u] - potential[v], which are non negative'''
+        dist = [INF]*self.numNodes
+        dist[source] = 0
+        heap = [(0, source)]
+        while len(heap) > 0:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, capacity, c, rev in self.graph[u]:
+                if capacity > 0:
+                    nd = d + c + potential[u] - potential[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        return dist
+
+    def _blockingFlow(self, source, sink, potential):
+        '''
+            Dinic's algorithm restricted to the edges whose reduced cost is 0, ie which lie on a cheapest path
+            @return: flow pushed
+        '''
+        graph = self.graph
+        total = 0
+        while True:
+            #BFS levels over admissible edges
+            level = [-1]*self.numNodes
+            level[source] = 0
+            queue = [source]
+            i = 0
+            while i < len(queue):
+                u = queue[i]
+                i += 1
+                for v, capacity, c, rev in graph[u]:
+                    if capacity > 0 and level[v] == -1 and c + potential[u] - potential[v] == 0:
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if level[sink] == -1:
+                return total
+
+            #iterative DFS with current arc pointers
+            nextEdge = [0]*self.numNodes
+            while True:
+                path = [] #edges from source to the top of the search
+                u = source
+                while u != sink:
+                    edges = graph[u]
+                    while nextEdge[u] < len(edges):
+                        v, capacity, c, rev = edges[nextEdge[u]]
+                        if capacity > 0 and level[v] == level[u] + 1 and c + potential[u] - potential[v] == 0:
+                            break
+                        nextEdge[u] += 1
+                    if nextEdge[u] == len(edges):
+                        #dead end, retreat
+                        level[u] = -1
+                        if len(path) == 0:
+                            break
+                        edge = path.pop()
+                        u = graph[edge[0]][edge[3]][0]
+                        nextEdge[u] += 1
+                        continue
+                    edge = edges[nextEdge[u]]
+                    path.append(edge)
+                    u = edge[0]
+
+                if u != sink:
+                    break
+
+                pushed = min([edge[1] for edge in path])
+                for edge in path:
+                    edge[1] -= pushed
+                    graph[edge[0]][edge[3]][1] += pushed
+                total += pushed
@@ -0,0 +1,271 @@
+#Optimizer Class
+#Branch-and-bound search for the best schedule according to an objective instead of the first one found
+import heapq
+
+from Solver import Solver
+from Analyzer import Analyzer
+from Ordering import PriorityValueOrder
+from Eligibility import bitIndexes
+
+INF = float("inf")
+
+class CostValueOrder(PriorityValueOrder):
+    '''Tries the cheapest employees for the shift first according to the Optimizer's costs, ties are broken by priority'''
+    name = "cost"
+
+    def candidates(self, s):
+        solver = self.solver
+        priorities = solver.matrix.priorities
+        heap = [((solver.costs[s][e], priorities[e], e), e) for e in bitIndexes(solver.domains[s])]
+        heapq.heapify(heap)
+        return heap
+
+class Optimizer(Analyzer):
+    '''
+        Finds the schedule minimizing an objective:
+            "priority": sum of the priorities of the employees working each shift (lower priority is better)
+            "fairness": variance of the number of shifts of the employees in the month (shifts already assigned included)
+            a function penalty(employee, shiftDay, lunch, time) returning a number: sum of the penalties of every
+            assignment, eg to follow preferences
+        The Solver's search runs with one more propagation step: a branch fails when its lower bound is not below the
+        cost of the best schedule found so far, so each complete schedule reached is better than the previous one.
+        Lower bounds are admissible (never above the cost of a completion of the branch):
+            - priority & penalty: cost of the shifts filled plus, for each empty shift, the cheapest employee left in its
+              domain. The minimums follow the domains as they are pruned and restored, a shift is only rescanned when
+              its domain changes
+            - fairness: sum of squared shift counts if the empty shifts were spread as evenly as possible (water-filling),
+              each employee getting at most their remaining maxshifts and the number of empty shifts they are still
+              in the domain of
+        With integer costs, priority & penalty objectives are first solved exactly as a min-cost flow on the Analyzer's
+        network (its caps are exact), the cost of each assignment on the employee's day -> shift edges: the schedule it
+        gives is optimal and no search is needed.
+        When the search ends the best schedule is optimal. When a limit given to setLimits is reached the best schedule
+        found is written, lowerBound is the lowest bound of the branches not explored yet and gap = cost - lowerBound.
+        Backjumping and symmetry are turned off, their nogoods and skipped employees don't take the bound into account.
+    '''
+
+    def __init__(self, scheduler, objective="priority", forwardCheck=True, variableOrder="mrv", valueOrder=None, matching=False):
+        '''
+            @params objective: "priority", "fairness" or a penalty function, see above
+            @params valueOrder: see Solver, None tries the cheapest employees first ("fewest" shifts so far for fairness)
+        '''
+        assert objective in ("priority", "fairness") or callable(objective), "objective must be 'priority', 'fairness' or a function"
+        if valueOrder == None:
+            valueOrder = CostValueOrder()
+            if objective == "fairness":
+                valueOrder = "fewest"
+        Solver.__init__(self, scheduler, forwardCheck, variableOrder, valueOrder, False, matching)
+        self.objective = objective
+        self.cost = None #objective of the schedule written by the last solve, None if none was found
+        self.lowerBound = None #proven lower bound on the objective of any schedule
+        self.gap = None #cost - lowerBound, 0 if the schedule is optimal
+        self.found = 0 #number of schedules found during the last solve, each better than the previous one
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: ignored, kept for the same signature as Solver.solve
+            @return: True if a complete schedule was found, the best one is written. self.stopped is set if a limit was
+                     reached before it was proven optimal, the calendar then holds the best partial schedule if none was found
+        '''
+        self.bestCost = INF
+        self.found = 0
+        self.stopped = False
+        self.nodes = 0
+        best = self._flowSchedule()
+        if best != None:
+            self.found = 1
+        else:
+            for found in self._search(-1):
+                self.bestCost = self._bound()
+                best = list(self.assignment)
+                self.found += 1
+
+        self.cost = None
+        self.lowerBound = None
+        self.gap = None
+        if self.stopped:
+            lowest = self.bounds[len(self.stack)] #remaining candidates of the shift being decided
+            for level in range(0, len(self.stack)):
+                if len(self.stack[level][1]) > 0:
+                    lowest = self.bounds[level]
+                    break
+            self.lowerBound = self._value(min(lowest, self.bestCost))
+        elif best != None:
+            self.lowerBound = self._value(self.bestCost)
+        if best == None:
+            return False
+        self.assignment = best
+        self._write()
+        self.cost = self._value(self.bestCost)
+        self.gap = self.cost - self.lowerBound
+        return True
+
+    def _flowSchedule(self):
+        '''
+            Loads the calendar, solves integer priority & penalty objectives with a min-cost flow
+            @return: the optimal assignment (self.bestCost is set to its cost), None if the objective is not one of those
+                     or if the empty shifts can't all be filled
+        '''
+        if self.objective == "fairness":
+            return None
+        self._load()
+        m = self.matrix
+        costs = {}
+        offset = 0 #the cheapest cost of each shift is taken out of its edges so they are non negative
+        for s in self.open:
+            if self.low[s] == INF or type(self.low[s]) != int:
+                return None
+            costs[s] = [c - self.low[s] if type(c) == int else None for c in self.costs[s]]
+            if None in [costs[s][e] for e in bitIndexes(self.domains[s])]:
+                return None
+            offset += self.low[s]
+        net, cuts, dayNode, shiftNode, days = self._network(self.open, self.domains, m.maxShifts, m.maxShiftsPW, costs)
+        flow, cost = net.run(0, 1)
+        if flow < len(self.open):
+            return None
+        self._assignFlow(self.open, cuts, dayNode, shiftNode, days)
+        self.bestCost = self.filledCost + offset + cost
+        return list(self.assignment)
+
+    def _load(self):
+        '''Loads the calendar like the Solver, then the costs and the state of the lower bound'''
+        Solver._load(self)
+        m = self.matrix
+        numEmps = m.numEmployees()
+        if self.objective == "priority" or self.objective == "fairness":
+            row = m.priorities
+            if self.objective == "fairness":
+                row = [0]*numEmps
+            self.costs = [row]*m.numShifts()
+        else:
+            self.costs = []
+            for s in range(0, m.numShifts()):
+                shiftDay, lunch, time = self.shifts[s]
+                self.costs.append([self.objective(self.employees[e], shiftDay, lunch, time) for e in range(0, numEmps)])
+
+        self.filledCost = 0 #cost of the shifts with an employee
+        for s in range(0, m.numShifts()):
+            if self.assignment[s] != None:
+                self.filledCost += self.costs[s][self.assignment[s]]
+        self.low = {} #empty open shift -> cost of the cheapest employee in its domain, INF if it has none
+        self.lowSum = 0 #sum of the finite ones
+        self.stuck = 0 #number of empty open shifts without candidates
+        self.inDomains = [0]*numEmps #number of empty open shifts whose domain has each employee
+        for s in self.open:
+            self.low[s] = self._cheapest(s)
+            self._addLow(self.low[s], 1)
+            for e in bitIndexes(self.domains[s]):
+                self.inDomains[e] += 1
+        self.empty = len(self.open)
+        self.total = len(self.open) + len([a for a in self.assignment if a != None]) #shifts of each schedule
+        self.changes = [] #undo information of the bound, see _propagate
+        self.marks = []
+        self.bounds = [self._bound()] #bounds[level]: bound once the decisions of the first level stack entries are made
+
+    def _cheapest(self, s):
+        costs = self.costs[s]
+        res = INF
+        for e in bitIndexes(self.domains[s]):
+            if costs[e] < res:
+                res = costs[e]
+        return res
+
+    def _addLow(self, low, sign):
+        if low == INF:
+            self.stuck += sign
+        else:
+            self.lowSum += sign*low
+
+    def _propagate(self, s, e):
+        '''Solver's propagation, then updates the bound with the shift filled and the domains pruned, and checks it'''
+        mark = len(self.trail)
+        res = Solver._propagate(self, s, e)
+        self.marks.append(len(self.changes))
+        self.changes.append((s, self.low[s], self.domains[s]))
+        self.filledCost += self.costs[s][e]
+        self._addLow(self.low[s], -1)
+        self.empty -= 1
+        for other in bitIndexes(self.domains[s]):
+            self.inDomains[other] -= 1
+        for i in range(mark, len(self.trail)):
+            t, d = self.trail[i]
+            self.changes.append((t, self.low[t], d & ~self.domains[t]))
+            self._addLow(self.low[t], -1)
+            self.low[t] = self._cheapest(t)
+            self._addLow(self.low[t], 1)
+            for other in bitIndexes(d & ~self.domains[t]):
+                self.inDomains[other] -= 1
+        if not res:
+            return False
+
+        bound = self._bound()
+        if bound >= self.bestCost:
+            self.failed = []
+            return False
+        level = len(self.stack)
+        del self.bounds[level+1:]
+        self.bounds.append(bound)
+        return True
+
+    def _undo(self, s, mark):
+        changed = self.marks.pop()
+        while len(self.changes) > changed + 1:
+            t, low, removed = self.changes.pop()
+            self._addLow(self.low[t], -1)
+            self.low[t] = low
+            self._addLow(low, 1)
+            for other in bitIndexes(removed):
+                self.inDomains[other] += 1
+        s, low, domain = self.changes.pop()
+        self.filledCost -= self.costs[s][self.assignment[s]]
+        self._addLow(low, 1)
+        self.empty += 1
+        for other in bitIndexes(domain):
+            self.inDomains[other] += 1
+        Solver._undo(self, s, mark)
+
+    def _bound(self):
+        '''@return: lower bound of the objective of any completion of the current assignment, INF if there is none'''
+        if self.stuck > 0:
+            return INF #an empty shift has no candidate left
+        if self.objective != "fairness":
+            return self.filledCost + self.lowSum
+
+        #raise the lowest counts first: find the level T the counts reach once the empty shifts are spread
+        m = self.matrix
+        counts = self.monthCount
+        room = []
+        for e in range(0, m.numEmployees()):
+            r = self.inDomains[e]
+            if m.maxShifts[e] != None:
+                r = min(r, max(0, m.maxShifts[e] - counts[e]))
+            room.append(r)
+        if sum(room) < self.empty:
+            return INF
+        low = min(counts)
+        high = max(counts) + self.empty
+        while low < high:
+            level = (low + high)//2
+            if self._spread(level, room) >= self.empty:
+                high = level
+            else:
+                low = level + 1
+        #every count raised to low-1 at most, the shifts left each raise a count from low-1 to low
+        total = 0
+        for e in range(0, m.numEmployees()):
+            c = counts[e] + min(room[e], max(0, low - 1 - counts[e]))
+            total += c*c
+        return total + (self.empty - self._spread(low - 1, room))*(2*low - 1)
+
+    def _spread(self, level, room):
+        '''@return: number of shifts needed to raise every employee's count to level, within their room'''
+        counts = self.monthCount
+        return sum([min(room[e], max(0, level - counts[e])) for e in range(0, len(room))])
+
+    def _value(self, bound):
+        '''@return: the objective for a bound, sums of squared counts become the variance for fairness'''
+        if self.objective != "fairness" or bound == INF:
+            return bound
+        n = self.matrix.numEmployees()
+        mean = self.total/float(n)
+        return bound/float(n) - mean*mean
@@ -0,0 +1,153 @@
+#Ordering Strategies
+#Decide which open shift the Solver fills next (variable ordering) and in which order employees are tried for it (value ordering)
+import heapq
+import random
+
+from Eligibility import popcount, bitIndexes
+
+class CalendarOrder:
+    '''
+        Fills shifts in calendar order (day by day, lunch before dinner, earliest first), like the recursive
+        Scheduler.assignEmployee. Gives reproducible schedules.
+    '''
+    name = "calendar"
+
+    def start(self, solver):
+        '''Called once the solver has loaded the calendar, before the search starts'''
+        self.solver = solver
+
+    def select(self):
+        '''@return: index of the next shift to fill'''
+        return self.solver.open[len(self.solver.stack)]
+
+    def update(self, s):
+        '''Called when the domain of shift s changed or s was unassigned'''
+        pass
+
+class MostConstrainedOrder:
+    '''
+        Minimum remaining values: fills the open shift with the fewest employees left in its domain first, anywhere in the month.
+        A heap holds (domain size, shift) entries. An entry is pushed every time a domain changes or a shift is
+        unassigned, outdated entries are skipped when popped. Ties go to the earliest shift.
+    '''
+    name = "mrv"
+
+    def start(self, solver):
+        self.solver = solver
+        self.heap = [(popcount(solver.domains[s]), s) for s in solver.open]
+        heapq.heapify(self.heap)
+
+    def select(self):
+        domains = self.solver.domains
+        assignment = self.solver.assignment
+        while True:
+            size, s = heapq.heappop(self.heap)
+            if assignment[s] == None and size == popcount(domains[s]):
+                return s
+
+    def update(self, s):
+        if self.solver.assignment[s] == None:
+            heapq.heappush(self.heap, (popcount(self.solver.domains[s]), s))
+
+class PriorityValueOrder:
+    '''
+        Tries employees by Employee.priority (lower is better), ties keep the employee list order.
+        Value orderings return a heap of (key, employee) for the shift, the solver pops one entry per candidate tried.
+    '''
+    name = "priority"
+
+    def start(self, solver):
+        self.solver = solver
+
+    def candidates(self, s):
+        '''@return: heap of (key, employee index) entries for the employees in the domain of shift s'''
+        priorities = self.solver.matrix.priorities
+        heap = [((priorities[e], e), e) for e in bitIndexes(self.solver.domains[s])]
+        heapq.heapify(heap)
+        return heap
+
+class FewestShiftsOrder(PriorityValueOrder):
+    '''
+        Tries the employees with the fewest shifts so far first (the solver's live count of Employee.curNumShifts()),
+        spreads shifts evenly, ties are broken by priority.
+    '''
+    name = "fewest"
+
+    def candidates(self, s):
+        priorities = self.solver.matrix.priorities
+        monthCount = self.solver.monthCount
+        heap = [((monthCount[e], priorities[e], e), e) for e in bitIndexes(self.solver.domains[s])]
+        heapq.heapify(heap)
+        return heap
+
+class LeastConstrainingOrder(PriorityValueOrder):
+    '''
+        Tries first the employees whose assignment removes the fewest candidates from other open shifts:
+        the other shifts of that day, plus the rest of the week/month if it brings them to a maxshiftspw/maxshifts cap.
+        Ties are broken by priority.
+    '''
+    name = "lcv"
+
+    def candidates(self, s):
+        solver = self.solver
+        priorities = solver.matrix.priorities
+        heap = []
+        for e in bitIndexes(solver.domains[s]):
+            heap.append(((self.removals(s, e), priorities[e], e), e))
+        heapq.heapify(heap)
+        return heap
+
+    def removals(self, s, e):
+        '''@return: number of open shifts other than s which would lose employee e if e was assigned to s'''
+        solver = self.solver
+        m = solver.matrix
+        targets = solver.openByDay[m.shiftDay[s]]
+        cap = m.maxShifts[e]
+        if cap != None and solver.monthCount[e] + 1 >= cap:
+            targets = solver.open
+        else:
+            cap = m.maxShiftsPW[e]
+            if cap != None and solver.weekCount[e][m.shiftWeek[s]] + 1 >= cap:
+                targets = solver.openByWeek[m.shiftWeek[s]]
+
+        bit = 1 << e
+        count = 0
+        for t in targets:
+            if t != s and solver.domains[t] & bit and solver.assignment[t] == None:
+                count += 1
+        return count
+
+class RandomValueOrder(PriorityValueOrder):
+    '''
+        Tries employees by priority like PriorityValueOrder but breaks ties randomly, with a seed so that
+        different seeds explore the search space in different orders (see Portfolio.py)
+    '''
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def candidates(self, s):
+        priorities = self.solver.matrix.priorities
+        heap = [((priorities[e], self.random.random()), e) for e in bitIndexes(self.solver.domains[s])]
+        heapq.heapify(heap)
+        return heap
+
+VARIABLE_ORDERS = {CalendarOrder.name : CalendarOrder,
+                   MostConstrainedOrder.name : MostConstrainedOrder}
+
+VALUE_ORDERS = {PriorityValueOrder.name : PriorityValueOrder,
+                FewestShiftsOrder.name : FewestShiftsOrder,
+                LeastConstrainingOrder.name : LeastConstrainingOrder,
+                RandomValueOrder.name : RandomValueOrder}
+
+def makeOrder(order, orders):
+    '''
+        @params order: name of a strategy in orders, or a strategy object which is returned as is
+        @params orders: dictionary mapping names to strategy classes
+        @return: strategy object
+    '''
+    if type(order) == str:
+        assert order in orders, "unknown ordering '%s', expected one of %s"%(order, sorted(orders.keys()))
+        return orders[order]()
+    return order
@@ -0,0 +1,105 @@
+#Portfolio Solver Class
+#Runs several Solver configurations in parallel processes, the first one to finish wins
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from Solver import Solver
+from Ordering import RandomValueOrder
+
+#Solver options of each configuration, differing orderings make it unlikely that all of them get stuck
+DEFAULT_CONFIGS = [{"forwardCheck" : True},
+                   {"forwardCheck" : True, "valueOrder" : "lcv"},
+                   {"forwardCheck" : True, "variableOrder" : "calendar", "backjump" : True, "symmetry" : True},
+                   {"forwardCheck" : True, "valueOrder" : "fewest", "matching" : True},
+                   {"forwardCheck" : True, "valueOrder" : RandomValueOrder(1), "backjump" : True},
+                   {"forwardCheck" : True, "valueOrder" : RandomValueOrder(2), "matching" : True}]
+
+def _runConfig(matrix, fixed, options, depth, stop, shifts=None, timeLimit=None, nodeLimit=None):
+    '''
+        Solves the model in a worker process, see Solver.setModel and Solver.setLimits
+        @return: (result, [(shift, employee name)] of the open shifts filled, nodes, stopped)
+                 the shifts filled are those of the best partial schedule if the solver was stopped
+    '''
+    solver = Solver(None, **options)
+    solver.setModel(matrix, fixed, shifts)
+    solver.setLimits(timeLimit, nodeLimit, stop)
+    res = solver.solve(depth)
+    names = []
+    if res or solver.stopped:
+        for s in solver.open:
+            if solver.assignment[s] != None:
+                names.append((s, matrix.names[solver.assignment[s]]))
+    return res, names, solver.nodes, solver.stopped
+
+class Portfolio(Solver):
+    '''
+        Backtracking time varies a lot with the ordering strategies, this solver starts one process per configuration
+        on the same model (the EligibilityMatrix and the shifts already assigned, which are plain data). Every
+        configuration is a complete search, so the first one to finish decides: the others are told to stop and the
+        winning schedule is copied back into the calendar by employee name.
+        Limits given to setLimits apply to each process (the node limit is per configuration), if every configuration
+        runs out the partial schedule with the most shifts filled is written.
+    '''
+
+    def __init__(self, scheduler, configs=None, workers=None):
+        '''
+            @params configs: list of dictionaries of Solver options (orderings can be strategy objects, eg RandomValueOrder(seed)),
+                             DEFAULT_CONFIGS if None
+            @params workers: maximum number of processes, the number of cores if None
+        '''
+        Solver.__init__(self, scheduler)
+        self.configs = configs
+        if configs == None:
+            self.configs = DEFAULT_CONFIGS
+        assert len(self.configs) > 0, "the portfolio needs at least one configuration"
+        self.workers = workers
+        self.winner = None #options of the configuration which finished first during the last solve
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: integer indicating how many shifts to assign before stopping, -1 disables limiting depth
+            @return: True if found a complete schedule, False if not. Modifies the shiftcalendar in place
+        '''
+        matrix, fixed = self.getModel()
+        self.stopped = False
+        manager = multiprocessing.Manager()
+        stop = manager.Event()
+        result = None
+        partials = [] #results of the configurations which ran out
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for options in self.configs:
+                futures[pool.submit(_runConfig, matrix, fixed, options, depth, stop, None, self.timeLeft(), self.nodeLimit)] = options
+            pending = set(futures.keys())
+            while result == None and len(pending) > 0:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                if self.timeLeft() == 0 or (self.stop != None and self.stop.is_set()):
+                    stop.set() #deadline or cancelled by the caller, also stops the configurations still queued
+                for future in done:
+                    res = future.result()
+                    if res[3]:
+                        partials.append(res)
+                    elif result == None:
+                        result = res
+                        self.winner = futures[future]
+            stop.set()
+            for future in pending:
+                future.cancel()
+        manager.shutdown()
+
+        if result == None:
+            self.stopped = True
+            result = max(partials, key=lambda res: len(res[1]))
+            self.nodes = sum([res[2] for res in partials])
+        else:
+            self.nodes = result[2]
+        res, names = result[0], result[1]
+        if not res and not self.stopped:
+            return False
+        index = {}
+        for i in range(0, len(self.employees)):
+            index[self.employees[i].getName()] = i
+        for s, name in names:
+            self._assign(s, index[name])
+        self._write()
+        return res
@@ -0,0 +1,121 @@
+#Repair Solver Class
+#Fixes an existing schedule after an edit instead of scheduling the whole month again
+from Solver import Solver
+
+RADIUSES = [0, 1, 3, 7, None] #days around the broken shifts opened again at each attempt, None is the whole month
+
+class RepairSolver(Solver):
+    '''
+        Keeps every assignment of the calendar which is still valid and only reschedules around the broken ones:
+            - shifts that are empty (eg added since the last run)
+            - shifts whose employee was removed, or whose rules no longer allow that shift
+            - the extra shifts of an employee working twice a day or over their maxshifts/maxshiftspw caps
+              (the latest ones in the month are dropped)
+        The shifts of the days around them are emptied too and the Solver fills them with every other assignment fixed.
+        If that fails the neighborhood grows (same day, +-1, +-3, +-7 days, whole month) so as few assignments as
+        possible change.
+    '''
+
+    def __init__(self, scheduler, options=None):
+        '''
+            @params options: dictionary of Solver options used to fill the neighborhood, {} if None
+        '''
+        Solver.__init__(self, scheduler)
+        self.options = options
+        if options == None:
+            self.options = {}
+        self.broken = 0 #number of assignments which broke a rule before the last solve
+        self.changed = 0 #number of assignments the last solve changed or removed, the broken ones included
+
+    def brokenShifts(self):
+        '''@return: list of (shiftDay, lunch, time) of the assignments of the calendar which break a rule, in calendar order'''
+        names = set([e.getName() for e in self.employees])
+        monthCount = {}
+        weekCount = {}
+        res = []
+        for shiftDay in self.cal.days:
+            working = set()
+            times = shiftDay.getAllShifts()
+            for lunch, shiftTimes, assigned in ((True, times[0], shiftDay.lunchShifts), (False, times[1], shiftDay.dinnerShifts)):
+                for t in shiftTimes:
+                    emp = assigned[t]
+                    if emp == None:
+                        continue
+                    name = emp.getName()
+                    month = monthCount.get(name, 0)
+                    week = weekCount.get((name, shiftDay.weeknum), 0)
+                    if (name not in names or name in working
+                            or not emp.matchAvailability(lunch, t, shiftDay.weekday, shiftDay.weeknum, shiftDay.dayNum)
+                            or (emp.getMaxShifts() != None and month >= emp.getMaxShifts())
+                            or (emp.getMaxShiftsPW() != None and week >= emp.getMaxShiftsPW())):
+                        res.append((shiftDay, lunch, t))
+                        continue
+                    working.add(name)
+                    monthCount[name] = month + 1
+                    weekCount[(name, shiftDay.weeknum)] = week + 1
+        return res
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: integer indicating how many shifts to assign before stopping, -1 disables limiting depth
+            @return: True if the schedule was repaired, False if not or if a limit given to setLimits was reached
+                     (the broken assignments are removed, the others kept). Modifies the shiftcalendar in place
+        '''
+        self.stopped = False
+        self.nodes = 0
+        broken = self.brokenShifts()
+        self.broken = len(broken)
+        for shift in broken:
+            self._setShift(shift, None)
+
+        empty = [] #(shiftDay, lunch, time) of the shifts to fill
+        for shiftDay in self.cal.days:
+            for lunch, assigned in ((True, shiftDay.lunchShifts), (False, shiftDay.dinnerShifts)):
+                for t in assigned.keys():
+                    if assigned[t] == None:
+                        empty.append((shiftDay, lunch, t))
+        if len(empty) == 0:
+            self.changed = self.broken
+            return True
+
+        for radius in RADIUSES:
+            #empty the neighborhood, keeping the old assignments to put them back if it can't be filled
+            old = []
+            for shiftDay in self.cal.days:
+                if radius != None and min([abs(shiftDay.dayNum - shift[0].dayNum) for shift in empty]) > radius:
+                    continue
+                for lunch, assigned in ((True, shiftDay.lunchShifts), (False, shiftDay.dinnerShifts)):
+                    for t in assigned.keys():
+                        if assigned[t] != None:
+                            old.append(((shiftDay, lunch, t), assigned[t]))
+                            self._setShift((shiftDay, lunch, t), None)
+
+            solver = Solver(self.scheduler, **self.options)
+            solver.deadline = self.deadline
+            solver.nodeLimit = None if self.nodeLimit == None else max(1, self.nodeLimit - self.nodes)
+            solver.stop = self.stop
+            res = solver.solve(depth)
+            self.nodes += solver.nodes
+            if res:
+                self.changed = self.broken
+                for shift, emp in old:
+                    if self._getShift(shift) is not emp:
+                        self.changed += 1
+                return True
+
+            for shift in empty:
+                self._setShift(shift, None)
+            for shift, emp in old:
+                self._setShift(shift, None)
+                self._setShift(shift, emp)
+            if solver.stopped:
+                self.stopped = True #the neighborhood keeps its old assignments
+                break
+        self.changed = self.broken
+        return False
+
+    def _getShift(self, shift):
+        shiftDay, lunch, time = shift
+        if lunch:
+            return shiftDay.lunchShifts[time]
+        return shiftDay.dinnerShifts[time]
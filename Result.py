@@ -0,0 +1,45 @@
+#Solve Result Class
+#Outcome of Scheduler.solve: status, schedule found and solver statistics
+
+class SolveResult:
+    '''
+        status is one of:
+            SOLVED: every open shift was filled
+            INFEASIBLE: the rules leave no way to fill every open shift
+            TIMEOUT: the deadline or node limit was reached or the solve was cancelled before an answer,
+                     schedule holds the best partial schedule found
+        schedule is a list of (dayNum, lunch, time, employee) for every shift filled by the solve, in calendar order
+        stats is a dictionary: engine, nodes, seconds, plus what the engine counts (jumps, conflicts, violations, ...)
+        certificate is the list of reasons Scheduler.analyze found for an INFEASIBLE month, empty if the solver itself failed
+    '''
+    SOLVED = "solved"
+    INFEASIBLE = "infeasible"
+    TIMEOUT = "timeout"
+
+    def __init__(self, status, schedule, numOpen, stats, certificate=None):
+        '''
+            @params status: SOLVED, INFEASIBLE or TIMEOUT
+            @params schedule: list of (dayNum, lunch, time, employee)
+            @params numOpen: number of shifts which had to be filled
+            @params stats: dictionary
+            @params certificate: list of strings, [] if None
+        '''
+        assert status in (self.SOLVED, self.INFEASIBLE, self.TIMEOUT), "unknown status '%s'"%(status)
+        self.status = status
+        self.schedule = schedule
+        self.numOpen = numOpen
+        self.filled = len(schedule)
+        self.stats = stats
+        self.certificate = certificate
+        if certificate == None:
+            self.certificate = []
+
+    def isSolved(self):
+        return self.status == self.SOLVED
+
+    def __str__(self):
+        return "%s: %d of %d shifts filled (%s)"%(self.status, self.filled, self.numOpen,
+                                                 ", ".join(["%s: %s"%(k, self.stats[k]) for k in sorted(self.stats.keys())]))
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,133 @@
+#SAT Solver Class
+#Encodes the open shifts of a ShiftCalendar and the employees' rules as CNF, solved by the bundled CDCL solver
+from Solver import Solver
+from Cdcl import CDCL
+from Eligibility import bitIndexes
+
+class SatSolver(Solver):
+    '''
+        Alternative backend for hard months, one boolean variable per (open shift, employee who can work it):
+            - availability & exclude rules and shifts already assigned only decide which variables exist
+            - every open shift gets exactly one employee
+            - an employee works at most one shift per day
+            - maxshifts/maxshiftspw caps, minus the shifts already assigned, are at most k constraints
+        At most k constraints (including the at most one above) use Sinz's sequential counter encoding,
+        which needs O(n*k) auxiliary variables and clauses instead of the O(n^k) of the naive encoding.
+        The SAT solver only looks for a feasible schedule, priorities are not taken into account.
+    '''
+
+    def __init__(self, scheduler):
+        Solver.__init__(self, scheduler)
+        self.conflicts = 0 #conflicts of the CDCL solver during the last solve
+
+    def encode(self):
+        '''
+            Loads the current calendar and builds its CNF
+            @return: (number of variables, list of clauses), clauses are lists of DIMACS literals
+        '''
+        self._load()
+        m = self.matrix
+        self.numVars = 0
+        self.clauses = []
+        self.variables = {} #(shift, employee) -> variable
+        byEmployee = [[] for e in range(0, m.numEmployees())] #shifts each employee can take
+        for s in self.open:
+            lits = []
+            for e in bitIndexes(self.domains[s]):
+                v = self._newVar()
+                self.variables[(s, e)] = v
+                lits.append(v)
+                byEmployee[e].append(s)
+            self.clauses.append(lits) #at least one employee
+            self._atMost(lits, 1)
+
+        for e in range(0, m.numEmployees()):
+            days = {}
+            weeks = {}
+            for s in byEmployee[e]:
+                days.setdefault(m.shiftDay[s], []).append(self.variables[(s, e)])
+                weeks.setdefault(m.shiftWeek[s], []).append(self.variables[(s, e)])
+            for lits in days.values():
+                self._atMost(lits, 1)
+            if m.maxShifts[e] != None:
+                self._atMost([self.variables[(s, e)] for s in byEmployee[e]], m.maxShifts[e] - self.monthCount[e])
+            if m.maxShiftsPW[e] != None:
+                for week in weeks.keys():
+                    self._atMost(weeks[week], m.maxShiftsPW[e] - self.weekCount[e][week])
+        return self.numVars, self.clauses
+
+    def writeDimacs(self, filename):
+        '''
+            Writes the CNF of the current calendar in DIMACS format, comment lines give the shift & employee of each variable
+            @params filename: string
+        '''
+        numVars, clauses = self.encode()
+        f = open(filename, "w")
+        f.write("c shift scheduling, variable: day shift-time employee\n")
+        for (s, e), v in sorted(self.variables.items(), key=lambda item: item[1]):
+            shiftDay, lunch, time = self.shifts[s]
+            f.write("c %d: %d %s-%s %s\n"%(v, shiftDay.dayNum, "lunch" if lunch else "dinner", time, self.employees[e].getName()))
+        f.write("p cnf %d %d\n"%(numVars, len(clauses)))
+        for clause in clauses:
+            f.write(" ".join([str(l) for l in clause]) + " 0\n")
+        f.close()
+
+    def solve(self, depth=-1):
+        '''
+            @params depth: ignored, kept for the same signature as Solver.solve
+            @return: True if every open shift could be filled, False if not or if a limit given to setLimits was reached.
+                     Modifies the shiftcalendar in place
+        '''
+        numVars, clauses = self.encode()
+        sat = CDCL(numVars)
+        for clause in clauses:
+            sat.addClause(clause)
+        sat.interrupt = lambda: self._interrupt(sat)
+        self.stopped = False
+        res = sat.solve()
+        self.nodes = sat.decisions
+        self.conflicts = sat.conflicts
+        if res == None:
+            self.stopped = True #no partial schedule, the calendar is left as it was
+            return False
+        if not res:
+            return False
+
+        for (s, e), v in self.variables.items():
+            if sat.modelValue(v):
+                self._assign(s, e)
+        self._write()
+        return True
+
+    def _interrupt(self, sat):
+        '''Limits of setLimits, decisions of the CDCL solver count as nodes'''
+        self.nodes = sat.decisions
+        return self._outOfBudget()
+
+    def _newVar(self):
+        self.numVars += 1
+        return self.numVars
+
+    def _atMost(self, lits, k):
+        '''Adds the clauses of the sequential counter encoding of sum(lits) <= k'''
+        n = len(lits)
+        if k >= n:
+            return
+        if k <= 0:
+            for l in lits:
+                self.clauses.append([-l])
+            return
+
+        #r[i][j] is true if at least j+1 of lits[0..i] are true
+        r = [[self._newVar() for j in range(0, k)] for i in range(0, n-1)]
+        self.clauses.append([-lits[0], r[0][0]])
+        for j in range(1, k):
+            self.clauses.append([-r[0][j]])
+        for i in range(1, n-1):
+            self.clauses.append([-lits[i], r[i][0]])
+            self.clauses.append([-r[i-1][0], r[i][0]])
+            for j in range(1, k):
+                self.clauses.append([-lits[i], -r[i-1][j-1], r[i][j]])
+                self.clauses.append([-r[i-1][j], r[i][j]])
+            self.clauses.append([-lits[i], -r[i-1][k-1]])
+        self.clauses.append([-lits[n-1], -r[n-2][k-1]])
@@ -3,9 +3,24 @@
 import os
 import sys
 import pickle
+import time
 from Time import Time
 from ShiftCal import ShiftDay, ShiftCalendar
-from Employee import Employee, Rule
+from Employee import Employee
+from Solver import Solver
+from FlowSolver import FlowSolver
+from SatSolver import SatSolver
+from LocalSolver import LocalSolver
+from Portfolio import Portfolio
+from Decomposer import Decomposer
+from Result import SolveResult
+from Repair import RepairSolver
+from Analyzer import Analyzer
+from Diagnoser import Diagnoser
+from Optimizer import Optimizer
+from Eligibility import EligibilityMatrix
+from Availability import AvailabilityTensor
+from AvailabilityIndex import AvailabilityIndex
 
 class Scheduler:
     '''Shift Scheduler'''
@@ -23,6 +38,7 @@ class Scheduler:
 
 
         self.employeeList = [] #list of employee objects
+        self.index = AvailabilityIndex() #employees who can work each shift, follows employeeList and their rules
 
     def save(self, f, info = False):
         '''
@@ -85,6 +101,8 @@ class Scheduler:
 
             numEmps = pickle.load(f)
             if info: print("  Read num employees: %d"%numEmps)
+            for e in self.employeeList:
+                self.index.removeEmployee(e)
             self.employeeList = []
             emp_dict = {}
             print("")
@@ -97,6 +115,7 @@ class Scheduler:
                     emp = Employee("dummy", 1) #dummy employee who will be overwritten by loaded emp
                     if emp.load(f, info):
                         self.employeeList.append(emp)
+                        self.index.addEmployee(emp)
                         emp_dict[emp.getName()] = emp
                     else:
                         return False
@@ -105,6 +124,11 @@ class Scheduler:
             print("")
             self.cal = ShiftCalendar(1,1970) #dummy shiftCal
             if self.cal.load(f, emp_dict, info):
+                #count the shifts again from the calendar, older files counted weeks from 0
+                for e in self.employeeList:
+                    e.counters.clear(self.cal.numWeeks)
+                for dayNum, lunch, t, e in self.getSchedule():
+                    e.addShift(self.cal.getDay(dayNum).weeknum)
                 return True
             else:
                 print("Error occured loading calendar...")
@@ -121,6 +145,8 @@ class Scheduler:
         '''
         if employee.__class__.__name__ == "Employee":
             self.employeeList.append(employee)
+            self.index.addEmployee(employee)
+            employee.counters.resize(self.cal.numWeeks)
             print("Employee %s added."%employee.getName())
 
     def removeEmployee(self, employee):
@@ -135,6 +161,7 @@ class Scheduler:
                 self.cal.removeAllForEmp(employee)
                 print("Employee %s removed."%employee.getName())
                 self.employeeList.remove(employee)
+                self.index.removeEmployee(employee)
                 return 1
             else:
                 print("%s employee does not exist"%employee.getName())
@@ -205,6 +232,47 @@ class Scheduler:
         else:
             return -1
 
+    def infeasibleDays(self):
+        '''
+            Finds the days whose empty shifts can't all be filled by different employees (availability, exclusions & caps)
+            @return: list of (dayNum, number of empty shifts, number of shifts that can be filled at most)
+        '''
+        return Solver(self).infeasibleDays()
+
+    def analyze(self):
+        '''
+            Checks in polynomial time whether the empty shifts can all be filled (see Analyzer.py)
+            @return: list of strings explaining why they can't, empty if they can
+        '''
+        return Analyzer(self).analyze()
+
+    def availability(self, useNumpy=None):
+        '''
+            @params useNumpy: see AvailabilityTensor
+            @return: AvailabilityTensor of the employees (by priority, as the solvers number them) for every shift of the calendar
+        '''
+        return AvailabilityTensor(EligibilityMatrix(self.cal, sorted(self.employeeList), None, self.index), useNumpy)
+
+    def printAvailability(self):
+        '''Prints the days with the least slack (employees who can work that day minus shifts) and the coverage of each employee'''
+        tensor = self.availability()
+        slack = tensor.slack()
+        print("Days by slack (employees available minus shifts):")
+        for dayNum in sorted(slack.keys(), key=lambda day: (slack[day], day)):
+            print("  Day %d: %d%s"%(dayNum, slack[dayNum], " (can't be filled)" if slack[dayNum] < 0 else ""))
+        coverage = tensor.coverage()
+        print("Shifts each employee can work (of %d):"%(tensor.matrix.numShifts()))
+        for e in range(0, len(coverage)):
+            print("  %s: %d"%(tensor.matrix.names[e], coverage[e]))
+
+    def diagnose(self):
+        '''
+            Finds a minimal set of constraints (shifts to fill, caps, exclude rules, availability on a day) which can't all
+            hold, relaxing any one of them solves that conflict (see Diagnoser.py)
+            @return: list of strings describing the constraints, empty if the empty shifts can all be filled
+        '''
+        return Diagnoser(self).diagnose()
+
     def assignW(self, emp, weekdays, times, lunch = False):
         '''
             Assigns employee to shifts with given times for each weekday in weekdays
@@ -276,11 +344,11 @@ class Scheduler:
 
     def matchShift(self, employee, l, t, wd, wn, d):
         '''
-            Creates a rule from shift info provided and matches with given employee
+            Matches shift info provided with given employee (see Employee.canWork)
             @params employee: Employee object
             @params d: integer (1-31) indicating day to match
             @params l: boolean indicating whether to match a lunch or dinner shift
-            @params t: A string representing the time at which shift starts
+            @params t: A string or Time object representing the time at which shift starts
             @params wd: integer (0-6) indicating which day of the week shift is on
             @params wn: integer (1-6) indicating which number week the shift is on
 
@@ -290,28 +358,213 @@ class Scheduler:
             print("Employee not found.")
             return -1
 
-        shift_rule = Rule(lunch=l, time=t, weekday=wd, weeknum=wn, daynum=d)
+        if type(t) == str:
+            t = Time(t)
+        return employee.canWork(l, t, wd, wn, d)
 
-        return employee.matchRule(shift_rule)
+    def matchStats(self):
+        '''
+            @return: (lookups, misses) of the shifts remembered by matchShift, summed over the employees (see Employee.canWork)
+        '''
+        lookups = sum([e.matchLookups for e in self.employeeList])
+        misses = sum([e.matchMisses for e in self.employeeList])
+        return lookups, misses
 
-    def run(self, depth):
+    def run(self, depth=-1, forwardCheck=False, variableOrder="mrv", valueOrder="priority", backjump=False, matching=False, engine="search",
+            timeLimit=None, workers=None, nodeLimit=None, cancel=None, repair=False, symmetry=False, diagnose=False, objective="priority"):
         '''
             Run scheduler until finding a complete schedule
             Should take into account priority & alternate between all employees equally
+            @params depth: integer indicating how many shifts to assign before stopping, -1 disables limiting depth
+            @params forwardCheck: T/F whether the solver prunes the candidates of open shifts after each assignment
+                                  and backtracks as soon as a shift has none left
+            @params variableOrder: which open shift to fill next, "mrv" (fewest candidates left) or "calendar" (day by day)
+            @params valueOrder: which employee to try first, "priority", "lcv" (least constraining) or "fewest" (fewest shifts so far)
+            @params backjump: T/F whether the solver jumps back to the decisions responsible for a failure and remembers them as nogoods
+            @params matching: T/F whether the solver checks after each assignment that every day can still be filled
+                              Months which cannot be filled are reported before searching in any case, see analyze.
+            @params symmetry: T/F whether the solver skips employees with the same rules as one which already failed for a shift
+            @params engine: "search" (backtracking Solver), "flow" (min-cost flow, see FlowSolver.py),
+                            "sat" (CNF encoding solved by the CDCL solver, ignores priorities)
+                            "local" (local search, writes the best schedule found even if it still breaks rules, also when
+                            analyze shows the month can't be filled)
+                            "portfolio" (several search configurations in parallel processes, see Portfolio.py)
+                            "decompose" (independent groups of days searched in parallel processes, see Decomposer.py)
+                            or "optimize" (branch-and-bound for the schedule minimizing objective, see Optimizer.py).
+                            The search options above only apply to "search" and "decompose", "optimize" uses variableOrder
+                            and matching, always checks forward and tries the cheapest employees first.
+            @params timeLimit: seconds before giving up, None for no limit ("local" searches for 0.2s then)
+            @params workers: number of processes of the "portfolio" & "decompose" engines, None uses every core
+            @params nodeLimit: number of nodes before giving up, None for no limit
+            @params cancel: object with an is_set method (eg threading.Event), the solve gives up once it is set
+            @params repair: T/F whether to keep the current schedule and only reschedule the shifts which are empty or break a
+                            rule since the last run, and as few others as possible (search engine only, see Repair.py)
+            @params diagnose: T/F whether to also print a minimal set of conflicting constraints when the month can't be
+                              scheduled, see diagnose
+            @params objective: what the "optimize" engine minimizes, "priority" (sum of the priorities of the employees
+                               working each shift), "fairness" (variance of the shifts per employee) or a function
+                               penalty(employee, shiftDay, lunch, time) returning a number
+
+            @return: True if found a complete schedule, False if not. Modifies the shiftcalendar in place
+                     When a limit is reached the best partial schedule is kept in the calendar, see solve for more details
         '''
-        #Clear previous assignments
-        self.cal.clearAllShifts()
-        print("\nAll shifts cleared")
+        if not repair:
+            #Clear previous assignments
+            self.cal.clearAllShifts()
+            print("\nAll shifts cleared")
         self.cal.printCal()
         print("")
         print(self.employeeList)
-        res = self.assignEmployee(1, self.cal.getDay(1), self.employeeList.copy().sort(), depth)
-        print("\nScheduling Done: %s"%res)
+        solver = self._makeSolver(engine, forwardCheck, variableOrder, valueOrder, backjump, matching, timeLimit, workers, repair, symmetry,
+                                  objective)
+        certificate = []
+        if not repair:
+            certificate = self.analyze()
+        if len(certificate) > 0:
+            for line in certificate:
+                print(line)
+            if diagnose:
+                print("\nConflicting constraints, relax one of them:")
+                for line in self.diagnose():
+                    print("  " + line)
+            if engine != "local":
+                print("\nScheduling Done: False")
+                return False
+            print("\nSearching for the schedule breaking the fewest rules anyway")
+        solver.setLimits(timeLimit, nodeLimit, cancel)
+        res = solver.solve(depth)
+        if engine == "decompose":
+            print("%d independent groups of shifts"%(solver.groups))
+        print("\nScheduling Done: %s (%d nodes searched)"%(res, solver.nodes))
+        if solver.stopped and engine == "optimize" and res:
+            print("Gave up before proving the best schedule found optimal")
+        elif solver.stopped:
+            print("Gave up before the end, best partial schedule kept")
+        if engine == "local" and not res:
+            print("Best schedule found breaks %d rules"%(solver.violations))
+        if repair:
+            print("%d assignments broke a rule, %d changed"%(solver.broken, solver.changed))
+        if engine == "optimize" and res:
+            print("Cost %s, at least %s for any schedule (gap %s)"%(solver.cost, solver.lowerBound, solver.gap))
         return res
 
+    def solve(self, engine="search", timeLimit=None, nodeLimit=None, cancel=None, forwardCheck=False, variableOrder="mrv",
+              valueOrder="priority", backjump=False, matching=False, workers=None, repair=False, symmetry=False, objective="priority"):
+        '''
+            Same as run, without printing, for callers which need an answer within a budget
+            @params engine, timeLimit, nodeLimit, cancel, repair, objective & the solver options: see run
+
+            @return: SolveResult object, status SOLVED, INFEASIBLE or TIMEOUT (a limit was reached or the solve was cancelled)
+                     with the schedule found, or the one with the most shifts filled for TIMEOUT, and the certificate of
+                     analyze if the month was found infeasible before solving (the "local" engine still writes the schedule
+                     breaking the fewest rules then). Modifies the shiftcalendar in place
+        '''
+        start = time.perf_counter()
+        if not repair:
+            self.cal.clearAllShifts()
+        numOpen = sum([len(shiftDay.lunchShifts) + len(shiftDay.dinnerShifts) for shiftDay in self.cal.days])
+        solver = self._makeSolver(engine, forwardCheck, variableOrder, valueOrder, backjump, matching, timeLimit, workers, repair, symmetry,
+                                  objective)
+        solver.setLimits(timeLimit, nodeLimit, cancel)
+        certificate = []
+        if not repair:
+            certificate = self.analyze()
+        if len(certificate) > 0 and engine != "local":
+            res = False
+        else:
+            res = solver.solve()
+
+        stats = {"engine" : engine, "nodes" : solver.nodes, "seconds" : round(time.perf_counter() - start, 3)}
+        for name in ("jumps", "conflicts", "violations", "cost", "lowerBound", "gap", "broken", "changed", "groups"):
+            if hasattr(solver, name):
+                stats[name] = getattr(solver, name)
+        schedule = self.getSchedule()
+        if res:
+            status = SolveResult.SOLVED
+        elif solver.stopped and len(certificate) == 0:
+            status = SolveResult.TIMEOUT
+        else:
+            status = SolveResult.INFEASIBLE
+        return SolveResult(status, schedule, numOpen, stats, certificate)
+
+    def getSchedule(self):
+        '''@return: list of (dayNum, lunch, time, employee) of every shift with an employee, in calendar order'''
+        schedule = []
+        for shiftDay in self.cal.days:
+            for lunch, shifts in ((True, shiftDay.lunchShifts), (False, shiftDay.dinnerShifts)):
+                for t in sorted(shifts.keys()):
+                    if shifts[t] != None:
+                        schedule.append((shiftDay.dayNum, lunch, t, shifts[t]))
+        return schedule
+
+    def schedules(self, limit=None, distinct=True, forwardCheck=True, variableOrder="mrv", valueOrder="priority", matching=False):
+        '''
+            Enumerates complete schedules of the month (as if every shift was empty) without modifying the calendar
+            The search picks up where it left off for each new schedule, so they can be paged through lazily.
+            @params limit: maximum number of schedules, None for all of them
+            @params distinct: T/F whether to skip schedules which only swap interchangeable employees
+                              (same rules & priority), see Solver.solutions
+            @params forwardCheck, variableOrder, valueOrder, matching: see run
+
+            @return: generator of schedules, each a tuple of (dayNum, lunch, (hour, minute), employee name) for every shift,
+                     give one to useSchedule to fill the calendar with it
+        '''
+        solver = Solver(self, forwardCheck, variableOrder, valueOrder, False, matching)
+        matrix, fixed = solver.getModel()
+        solver.setModel(matrix, [None]*len(fixed))
+        return solver.solutions(limit, distinct)
+
+    def useSchedule(self, schedule):
+        '''
+            Fills the calendar with a schedule given by schedules
+            @params schedule: tuple of (dayNum, lunch, (hour, minute), employee name)
+        '''
+        employees = {}
+        for e in self.employeeList:
+            employees[e.getName()] = e
+        self.cal.clearAllShifts()
+        for dayNum, lunch, (hour, minute), name in schedule:
+            self.cal.assignShift(dayNum, Time(hour, minute), employees[name], lunch)
+
+    def _makeSolver(self, engine, forwardCheck, variableOrder, valueOrder, backjump, matching, timeLimit, workers, repair=False, symmetry=False,
+                    objective="priority"):
+        '''@return: solver object for engine, see run'''
+        assert engine in ("search", "flow", "sat", "local", "portfolio", "decompose", "optimize"), \
+               "engine must be 'search', 'flow', 'sat', 'local', 'portfolio', 'decompose' or 'optimize'"
+        options = {"forwardCheck" : forwardCheck, "variableOrder" : variableOrder, "valueOrder" : valueOrder,
+                   "backjump" : backjump, "matching" : matching, "symmetry" : symmetry}
+        if repair:
+            assert engine == "search", "repair only works with the search engine"
+            return RepairSolver(self, options)
+        solver = Solver(self, forwardCheck, variableOrder, valueOrder, backjump, matching, symmetry)
+        if engine == "flow":
+            solver = FlowSolver(self)
+        elif engine == "sat":
+            solver = SatSolver(self)
+        elif engine == "local":
+            if timeLimit == None:
+                timeLimit = 0.2
+            solver = LocalSolver(self, timeLimit)
+        elif engine == "portfolio":
+            solver = Portfolio(self, workers=workers)
+        elif engine == "decompose":
+            solver = Decomposer(self, options, workers)
+        elif engine == "optimize":
+            solver = Optimizer(self, objective, True, variableOrder, None, matching)
+        return solver
+
+    def exportDimacs(self, filename):
+        '''
+            Writes the CNF encoding of the current calendar (see SatSolver) in DIMACS format, to compare with other SAT solvers
+            Shifts which already have an employee are kept as they are.
+            @params filename: string
+        '''
+        SatSolver(self).writeDimacs(filename)
+
     def assignEmployee(self, daynum, shift_day, employeeList, depth=-1):
         '''
             Recursive function, on each call tries to assign employee from employeeList to an open shift in shift_day
+            NOTE: run uses the iterative Solver instead, kept for comparison (see Benchmark.py)
             Then removes employee assigned from employeeList and calls itself until day is filled.
             If employeeList empty and day not complete, declare failure
             Else if day is complete, rebuild employee list and call recursively on next day
@@ -344,16 +344,24 @@ class ShiftCalendar:
 
         self.numDays = max(list(cal.itermonthdays(self.year, self.month))) #get number of days in month
         self.firstDay = calendar.weekday(year,month,1) #mon=0 - sun=6
-        self.numWeeks = 5 if self.numDays>28 else 4
+        self.numWeeks = self._countWeeks()
 
         self.days = [] #list holding all ShiftDays
 
         day = self.firstDay #mon:0 - sun:6
 
         for i in range(0, self.numDays):
-            self.days.append(ShiftDay(day%7, i+1, day//7))
+            self.days.append(ShiftDay(day%7, i+1, self._weekOf(i+1)))
             day += 1
 
+    def _countWeeks(self):
+        '''@return: number of weeks (Monday to Sunday) the month touches, from 4 to 6'''
+        return self._weekOf(self.numDays)
+
+    def _weekOf(self, dayNum):
+        '''@return: week (Monday to Sunday) of day dayNum, weeks are numbered from 1 like in Rule'''
+        return (self.firstDay + dayNum - 1)//7 + 1
+
     def getDay(self, dayNum):
         '''
             @params dayNum: integer between 1-numDays
@@ -404,6 +412,7 @@ class ShiftCalendar:
             if info: print("  Read first day: %d"%self.firstDay)
             self.numWeeks = pickle.load(f)
             if info: print("  Read num weeks: %d"%self.numWeeks)
+            self.numWeeks = self._countWeeks() #older files can hold a wrong count
             print("  Loaded calendar attributes")
 
             print("  Loading shifts data...")
@@ -411,6 +420,7 @@ class ShiftCalendar:
             for i in range(0, self.numDays):
                 d = ShiftDay(0,0,0) #create dummy day
                 if d.load(f, emp_dict, i, info):
+                    d.weeknum = self._weekOf(d.dayNum) #older files numbered weeks from 0
                     self.days.append(d)
                 else:
                     print("\nError: Failed to load day %d."%i)
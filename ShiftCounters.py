@@ -0,0 +1,47 @@
+#Shift Counters Class
+#Shifts an employee works in the month and in each week, next to the caps of their rules, so a cap check is O(1)
+
+MAX_WEEKS = 6 #a month touches at most 6 weeks
+
+class ShiftCounters:
+    '''
+        Kept up to date by Employee.addShift/removeShift, which ShiftDay calls each time a shift is assigned or cleared,
+        and by Employee's rule changes for the caps (the lowest maxshifts/maxshiftspw of the rules, None if there is none).
+        Weeks are numbered from 1 like in Rule and ShiftDay, weeks[w-1] counts week w. There are always at least MAX_WEEKS
+        counts: an employee can be in several schedulers whose months have a different number of weeks.
+    '''
+
+    def __init__(self, numWeeks=MAX_WEEKS):
+        '''
+            @params numWeeks: number of weeks of the month (see ShiftCalendar.numWeeks), at least MAX_WEEKS are kept
+        '''
+        self.total = 0 #shifts in the month
+        self.weeks = [0]*max(numWeeks, MAX_WEEKS) #shifts in each week
+        self.maxShifts = None
+        self.maxShiftsPW = None
+
+    def resize(self, numWeeks):
+        '''Grows the weekly counts to numWeeks, never shrinks them'''
+        while len(self.weeks) < numWeeks:
+            self.weeks.append(0)
+
+    def clear(self, numWeeks):
+        '''Sets every count to 0, with numWeeks weeks (at least MAX_WEEKS)'''
+        self.total = 0
+        self.weeks = [0]*max(numWeeks, MAX_WEEKS)
+
+    def add(self, weeknum):
+        self.total += 1
+        self.weeks[weeknum-1] += 1
+
+    def remove(self, weeknum):
+        self.total -= 1
+        self.weeks[weeknum-1] -= 1
+
+    def monthFull(self):
+        '''@return: True if one more shift would go over maxshifts'''
+        return self.maxShifts != None and self.total >= self.maxShifts
+
+    def weekFull(self, weeknum):
+        '''@return: True if one more shift in week weeknum would go over maxshiftspw'''
+        return self.maxShiftsPW != None and self.weeks[weeknum-1] >= self.maxShiftsPW
@@ -0,0 +1,694 @@
+#Solver Class
+#Backtracking search used by Scheduler.run, keeps its own decision stack instead of recursing once per shift
+import heapq
+import time
+
+from Eligibility import EligibilityMatrix, bitIndexes
+from Ordering import VARIABLE_ORDERS, VALUE_ORDERS, makeOrder
+from Matching import hopcroftKarp
+
+MAX_NOGOOD_SIZE = 6 #longer conflicts are only used to jump back, not stored, they are seldom met again
+MAX_NOGOODS = 500 #when more nogoods are stored, only the half closest to the current assignment is kept
+
+class Solver:
+    '''
+        Iterative backtracking search that fills every empty shift of a Scheduler's ShiftCalendar
+        Availability is read from an EligibilityMatrix built at the start of each solve, only the
+        maxshifts/maxshiftspw caps and the one shift per day limit are checked against live counters.
+
+        Every open shift keeps a domain (bitset of the employees who can still work it). Each assignment removes
+        the employee from the other shifts of that day, and from every shift of the week/month once they reach
+        a maxshiftspw/maxshifts cap. With forward checking a branch is abandoned as soon as a domain is empty.
+
+        The next shift to fill is picked by a variable ordering strategy (see Ordering.py), by default the
+        shift with the fewest candidates left. Use variableOrder="calendar" for reproducible schedules.
+        The employees are tried in the order given by a value ordering strategy, by default by priority.
+
+        With backjumping every pruned candidate remembers which decisions (stack levels) removed it: the decision
+        that used the employee that day, or every decision that brought the employee to a cap. When a shift runs
+        out of candidates the search jumps straight back to the latest of those decisions, and the assignments
+        of all of them are stored as a nogood, those assignments are never all made again. Like the clauses of a
+        CDCL solver each nogood watches two of its assignments not currently made: only making a watched one looks
+        at the nogood, which then watches another one or, if all the others are made, forbids its last assignment
+        until a decision it depends on is undone. Nogoods of more than MAX_NOGOOD_SIZE assignments aren't stored,
+        and past MAX_NOGOODS the ones with the most assignments not currently made are dropped.
+
+        With matching every day whose candidates changed is checked after each assignment: an employee works at most
+        one shift per day so the open shifts of a day can only be filled if there is a perfect bipartite matching
+        between them and the employees left in their domains (Hopcroft-Karp, see Matching.py).
+
+        With symmetry employees with the same availability and caps are interchangeable as long as they have the same
+        counters and are in the same domains: once one of them failed for a shift, the others in the same state are
+        skipped for it instead of failing the same way (k! permutations of k such employees are only explored once).
+    '''
+
+    def __init__(self, scheduler, forwardCheck=False, variableOrder="mrv", valueOrder="priority", backjump=False, matching=False,
+                 symmetry=False):
+        '''
+            @params scheduler: Scheduler object whose calendar and employees will be used,
+                               None for a solver working on a model given to setModel (see Portfolio.py)
+            @params forwardCheck: T/F whether to backtrack as soon as an open shift has no candidate left
+            @params variableOrder: name of a strategy in Ordering.VARIABLE_ORDERS or a strategy object
+            @params valueOrder: name of a strategy in Ordering.VALUE_ORDERS or a strategy object
+            @params backjump: T/F whether to use conflict-directed backjumping and nogood learning
+            @params matching: T/F whether to backtrack as soon as the open shifts of a day cannot all be matched to different employees
+            @params symmetry: T/F whether to skip employees interchangeable with one which already failed for a shift
+        '''
+        self.scheduler = scheduler
+        self.forwardCheck = forwardCheck
+        self.backjump = backjump
+        self.matching = matching
+        self.symmetry = symmetry
+        self.order = makeOrder(variableOrder, VARIABLE_ORDERS)
+        self.valueOrder = makeOrder(valueOrder, VALUE_ORDERS)
+        self.cal = None
+        self.employees = []
+        if scheduler != None:
+            self.cal = scheduler.cal
+            self.employees = sorted(scheduler.employeeList) #by priority, index in this list is the index used in the matrix
+        self.matrix = None
+        self.model = None #(matrix, fixed) given to setModel, solved instead of the calendar
+        self.cache = None #RuleCache used to build the matrix, shared with other solvers (see Batch.py)
+        self.stop = None #object with an is_set method (eg threading.Event), the search gives up once it is set
+        self.deadline = None #time.monotonic() after which the search gives up
+        self.nodeLimit = None #number of nodes after which the search gives up
+        self.stopped = False #True if the last solve gave up because of stop, the deadline or the node limit
+        self.best = None #assignment with the most shifts filled seen during the last solve
+        self.nodes = 0 #number of (employee, shift) pairs tested during the last solve
+        self.jumps = 0 #number of backjumps over more than one decision
+        self.distinct = False #T/F whether the search skips schedules which only swap interchangeable employees, see solutions
+
+    def setLimits(self, timeLimit=None, nodeLimit=None, cancel=None):
+        '''
+            Bounds the next solve, when a limit is reached solve gives up, sets self.stopped and writes the
+            best partial schedule found
+            @params timeLimit: seconds from now, None for no deadline
+            @params nodeLimit: maximum number of nodes, None for no limit
+            @params cancel: object with an is_set method (eg threading.Event) set by the caller to cancel the solve
+        '''
+        self.deadline = None
+        if timeLimit != None:
+            self.deadline = time.monotonic() + timeLimit
+        self.nodeLimit = nodeLimit
+        self.stop = cancel
+
+    def timeLeft(self):
+        '''@return: seconds left before the deadline, None if there is none'''
+        if self.deadline == None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def setModel(self, matrix, fixed, shifts=None):
+        '''
+            Makes the solver work on plain data instead of a Scheduler, solve then leaves the schedule in self.assignment
+            @params matrix: EligibilityMatrix
+            @params fixed: list, index of the employee already working each shift of the matrix or None
+            @params shifts: list of the empty shifts to fill, None for all of them. The other empty shifts are left
+                            out of the problem (see Decomposer.py)
+        '''
+        self.model = (matrix, fixed, shifts)
+
+    def getModel(self):
+        '''
+            Loads the current calendar
+            @return: (matrix, fixed) plain data which can be pickled and given to setModel
+        '''
+        self._load()
+        return self.matrix, list(self.assignment)
+
+    def _load(self):
+        '''
+            Builds the eligibility matrix and the search state from the current calendar (or the model given to setModel),
+            shifts which already have an employee count towards that employee's counters.
+        '''
+        scope = None
+        if self.model != None:
+            matrix, fixed, scope = self.model
+            if scope != None:
+                scope = set(scope)
+            self.shifts = [None]*matrix.numShifts()
+        else:
+            index = None
+            if self.cache == None:
+                index = self.scheduler.index #the shared cache of a Batch already answers repeated shifts
+            matrix = EligibilityMatrix(self.cal, self.employees, self.cache, index)
+            index = {}
+            for i in range(0, len(self.employees)):
+                index[self.employees[i].getName()] = i
+            self.shifts = [] #(shiftDay, lunch, time) of each shift, same order as the matrix
+            fixed = []
+            for shiftDay in self.cal.days:
+                times = shiftDay.getAllShifts()
+                for lunch, shiftTimes, assigned in ((True, times[0], shiftDay.lunchShifts), (False, times[1], shiftDay.dinnerShifts)):
+                    for t in shiftTimes:
+                        self.shifts.append((shiftDay, lunch, t))
+                        if assigned[t] == None:
+                            fixed.append(None)
+                        else:
+                            fixed.append(index[assigned[t].getName()])
+
+        self.matrix = matrix
+        m = self.matrix
+        self.assignment = [None]*m.numShifts() #index of the employee working each shift
+        self.open = [] #indexes of the empty shifts, filled in this order
+        self.monthCount = [0]*m.numEmployees()
+        self.weekCount = [[0]*7 for i in range(0, m.numEmployees())] #weekCount[emp][weeknum]
+        self.dayUsed = {} #dayNum -> bitset of employees working that day
+        for dayNum in m.shiftDay:
+            self.dayUsed[dayNum] = 0
+
+        for s in range(0, m.numShifts()):
+            if fixed[s] != None:
+                self._assign(s, fixed[s])
+            elif scope == None or s in scope:
+                self.open.append(s)
+
+        self.openByDay = {} #dayNum -> open shifts of that day
+        self.openByWeek = {} #weeknum -> open shifts of that week
+        for s in self.open:
+            self.openByDay.setdefault(m.shiftDay[s], []).append(s)
+            self.openByWeek.setdefault(m.shiftWeek[s], []).append(s)
+
+        self.domains = [0]*m.numShifts()
+        self.trail = [] #(shift, previous domain) for every domain pruned, undone when backtracking
+        self.stack = [] #decisions, see solve
+        self.reasons = {} #shift -> levels responsible for each pruning of its domain, in trail order (backjumping only)
+        self.nogoods = [] #lists of (shift, employee) assignments, the first two are watched (backjumping only)
+        self.numNogoods = 0 #nogoods stored
+        self.watches = {} #(shift, employee) -> indexes of the nogoods watching that assignment
+        self.forbidden = {} #(shift, employee) -> index of the nogood whose other assignments are all made
+        self.forbiddenAt = {} #level -> assignments forbidden once the decision at that level was made, -1 for always
+        for s in self.open:
+            self.reasons[s] = []
+        for s in self.open:
+            for e in m.candidates(s):
+                if self._canWork(e, s):
+                    self.domains[s] |= 1 << e
+
+    def _canWork(self, e, s):
+        '''
+            Dynamic part of the match, static availability is checked by the matrix
+            @return: True if employee e is not already working that day and is under their caps
+        '''
+        m = self.matrix
+        if (self.dayUsed[m.shiftDay[s]] >> e) & 1:
+            return False
+        cap = m.maxShifts[e]
+        if cap != None and self.monthCount[e] >= cap:
+            return False
+        cap = m.maxShiftsPW[e]
+        if cap != None and self.weekCount[e][m.shiftWeek[s]] >= cap:
+            return False
+        return True
+
+    def _assign(self, s, e):
+        m = self.matrix
+        self.assignment[s] = e
+        self.monthCount[e] += 1
+        self.weekCount[e][m.shiftWeek[s]] += 1
+        self.dayUsed[m.shiftDay[s]] |= 1 << e
+
+    def _unassign(self, s):
+        m = self.matrix
+        e = self.assignment[s]
+        self.assignment[s] = None
+        self.monthCount[e] -= 1
+        self.weekCount[e][m.shiftWeek[s]] -= 1
+        self.dayUsed[m.shiftDay[s]] &= ~(1 << e)
+
+    def _propagate(self, s, e):
+        '''
+            Prunes the domains of open shifts after assigning employee e to shift s, every pruned domain is saved on self.trail
+            @return: False if forward checking and an open shift was left without candidates, or if matching and
+                     the open shifts of a day cannot be filled, True otherwise. self.failed is set to the shifts to blame
+        '''
+        m = self.matrix
+        mark = len(self.trail)
+        targets = self.openByDay[m.shiftDay[s]]
+        cap = m.maxShifts[e]
+        if cap != None and self.monthCount[e] >= cap:
+            targets = self.open
+        else:
+            cap = m.maxShiftsPW[e]
+            if cap != None and self.weekCount[e][m.shiftWeek[s]] >= cap:
+                targets = self.openByWeek[m.shiftWeek[s]]
+
+        level = len(self.stack)
+        capReason = None
+        if self.backjump and targets is not self.openByDay[m.shiftDay[s]]:
+            capReason = self._capLevels(e, level, targets is self.open, m.shiftWeek[s])
+
+        bit = 1 << e
+        for t in targets:
+            d = self.domains[t]
+            if d & bit and self.assignment[t] == None:
+                self.trail.append((t, d))
+                d &= ~bit
+                self.domains[t] = d
+                self.order.update(t)
+                if self.backjump:
+                    if capReason == None or m.shiftDay[t] == m.shiftDay[s]:
+                        self.reasons[t].append((level,))
+                    else:
+                        self.reasons[t].append(capReason)
+                if d == 0 and self.forwardCheck:
+                    self.failed = [t]
+                    return False
+
+        if self.matching:
+            days = set([m.shiftDay[s]])
+            for i in range(mark, len(self.trail)):
+                days.add(m.shiftDay[self.trail[i][0]])
+            for dayNum in days:
+                if not self._dayMatchable(dayNum):
+                    self.failed = self._openShiftsOf(dayNum)
+                    return False
+        return True
+
+    def _openShiftsOf(self, dayNum):
+        '''@return: list of the open shifts of that day which have no employee yet'''
+        res = []
+        for t in self.openByDay.get(dayNum, []):
+            if self.assignment[t] == None:
+                res.append(t)
+        return res
+
+    def _dayMatchable(self, dayNum):
+        '''@return: True if every open shift of that day can get a different employee from its domain'''
+        shifts = self._openShiftsOf(dayNum)
+        if len(shifts) == 0:
+            return True
+        adj = [bitIndexes(self.domains[t]) for t in shifts]
+        size, matchLeft = hopcroftKarp(adj, self.matrix.numEmployees())
+        return size == len(shifts)
+
+    def infeasibleDays(self):
+        '''
+            Checks each day of the calendar before searching, using the current assignments and caps
+            @return: list of (dayNum, open shifts, shifts which can be filled at most) for the days that cannot be completed
+        '''
+        self._load()
+        res = []
+        for dayNum in sorted(self.openByDay.keys()):
+            shifts = self._openShiftsOf(dayNum)
+            adj = [bitIndexes(self.domains[t]) for t in shifts]
+            size, matchLeft = hopcroftKarp(adj, self.matrix.numEmployees())
+            if size < len(shifts):
+                res.append((dayNum, len(shifts), size))
+        return res
+
+    def _capLevels(self, e, level, month, weeknum):
+        '''
+            @params level: level of the decision being made, it assigns employee e
+            @params month: True for the maxshifts cap, False for the maxshiftspw cap of week weeknum
+            @return: tuple of the levels of the decisions which assigned employee e (that month/week)
+        '''
+        shiftWeek = self.matrix.shiftWeek
+        levels = [level]
+        for i in range(0, len(self.stack)):
+            entry = self.stack[i]
+            if entry[2] == e and (month or shiftWeek[entry[0]] == weeknum):
+                levels.append(i)
+        return tuple(levels)
+
+    def _undo(self, s, mark):
+        '''Unassigns shift s and restores the domains pruned since len(self.trail) was mark'''
+        while len(self.trail) > mark:
+            t, d = self.trail.pop()
+            self.domains[t] = d
+            self.order.update(t)
+            if self.backjump:
+                self.reasons[t].pop()
+        if self.backjump:
+            for key in self.forbiddenAt.pop(len(self.stack), []):
+                del self.forbidden[key]
+        self._unassign(s)
+        self.order.update(s)
+
+    def _conflictLevels(self, s, exclude=-1):
+        '''@return: set of the levels which pruned the domain of shift s, except level exclude'''
+        levels = set()
+        for reason in self.reasons[s]:
+            levels.update(reason)
+        levels.discard(exclude)
+        return levels
+
+    def _nogoodLevels(self, s, e):
+        '''
+            @return: levels of the other assignments of a stored nogood that assigning employee e to shift s would complete,
+                     None if there is no such nogood
+        '''
+        i = self.forbidden.get((s, e))
+        if i == None:
+            return None
+        return [self.levelOf[t] for t, f in self.nogoods[i] if t != s]
+
+    def _forbid(self, key, i, level):
+        if key not in self.forbidden:
+            self.forbidden[key] = i
+            self.forbiddenAt.setdefault(level, []).append(key)
+
+    def _watch(self, s, e, level):
+        '''Employee e was just assigned to shift s at level: moves the watches of the nogoods watching that assignment'''
+        key = (s, e)
+        watching = self.watches.get(key)
+        if not watching:
+            return
+        keep = []
+        for i in watching:
+            nogood = self.nogoods[i]
+            if nogood[0] != key:
+                nogood[0], nogood[1] = nogood[1], nogood[0]
+            t, f = nogood[1]
+            if self.assignment[t] != None and self.assignment[t] != f:
+                keep.append(i) #the other watch can't be made, it was decided before this assignment
+                continue
+            for j in range(2, len(nogood)):
+                t, f = nogood[j]
+                if self.assignment[t] != f:
+                    nogood[0], nogood[j] = nogood[j], nogood[0]
+                    self.watches.setdefault(nogood[0], []).append(i)
+                    break
+            else:
+                keep.append(i)
+                t, f = nogood[1]
+                if self.assignment[t] == None:
+                    self._forbid(nogood[1], i, level) #every other assignment is made
+        self.watches[key] = keep
+
+    def _learn(self, conflict):
+        '''
+            Stores the assignments at the levels in conflict as a nogood watching its two latest ones, the search then
+            undoes the latest level: its assignment stays forbidden until the second latest one is undone
+        '''
+        levels = sorted(conflict, reverse=True)
+        if len(levels) > MAX_NOGOOD_SIZE:
+            return
+        nogood = [(self.stack[l][0], self.stack[l][2]) for l in levels]
+        i = len(self.nogoods)
+        self.nogoods.append(nogood)
+        self.numNogoods += 1
+        if len(nogood) == 1:
+            self._forbid(nogood[0], i, -1)
+        else:
+            self.watches.setdefault(nogood[0], []).append(i)
+            self.watches.setdefault(nogood[1], []).append(i)
+            self._forbid(nogood[0], i, levels[1])
+        if self.numNogoods > MAX_NOGOODS:
+            self._reduceNogoods()
+
+    def _reduceNogoods(self):
+        '''
+            Keeps the MAX_NOGOODS/2 nogoods with the fewest assignments not currently made (and those forbidding an
+            assignment), the others concern parts of the search which were left
+        '''
+        keep = set(self.forbidden.values())
+        ranked = [] #(assignments not made, newest first, index)
+        for i in range(0, len(self.nogoods)):
+            if i not in keep:
+                missing = len([1 for t, f in self.nogoods[i] if self.assignment[t] != f])
+                ranked.append((missing, -i, i))
+        ranked.sort()
+        for missing, newest, i in ranked[:MAX_NOGOODS//2]:
+            keep.add(i)
+        index = {}
+        nogoods = []
+        for i in range(0, len(self.nogoods)):
+            if i in keep:
+                index[i] = len(nogoods)
+                nogoods.append(self.nogoods[i])
+        self.nogoods = nogoods
+        self.numNogoods = len(nogoods)
+        for key in self.forbidden.keys():
+            self.forbidden[key] = index[self.forbidden[key]]
+        self.watches = {}
+        for i in range(0, len(nogoods)):
+            for key in nogoods[i][:2]:
+                self.watches.setdefault(key, []).append(i)
+
+    def _outOfBudget(self):
+        '''
+            @return: True if the node limit or the deadline is reached or the solve was cancelled, checked at every node:
+                     a node can cost milliseconds with backjumping or matching, polling less often would miss the deadline
+        '''
+        if self.nodeLimit != None and self.nodes >= self.nodeLimit:
+            return True
+        if self.deadline != None and time.monotonic() >= self.deadline:
+            return True
+        return self.stop != None and self.stop.is_set()
+
+    def _write(self):
+        '''Copies the assignment of every open shift into the calendar, if there is one'''
+        if self.model != None:
+            return
+        for s in self.open:
+            e = self.assignment[s]
+            if e != None:
+                self._setShift(self.shifts[s], self.employees[e])
+
+    def _setShift(self, shift, emp):
+        shiftDay, lunch, time = shift
+        if lunch:
+            shiftDay.setLunchShift(time, emp)
+        else:
+            shiftDay.setDinnerShift(time, emp)
+
+    def solve(self, depth=-1):
+        '''
+            Fills the empty shifts of the calendar one at a time, in the order chosen by the variable ordering strategy
+            Each entry of the decision stack is [shift, candidates, employee, trail mark, conflict, failed]: candidates is the
+            heap of employees not tried yet, built by the value ordering strategy when the shift is reached. The employee
+            is assigned to the shift and the domains pruned since the trail mark are undone with it. conflict is the set
+            of earlier levels blamed for the candidates which failed (backjumping only). failed holds the states of the
+            candidates which failed, by class of interchangeable employees (symmetry only).
+            When a shift has no candidate left the search goes back to the previous entry (or jumps back to the latest
+            level of its conflict set), undoes it and tries its next candidate.
+
+            @params depth: integer indicating how many shifts to assign before stopping, used for testing. -1 disables limiting depth
+
+            @return: True if found a complete schedule, False if not or if a limit given to setLimits was reached (self.stopped
+                     is then True and the best partial schedule is written). Modifies the shiftcalendar in place
+        '''
+        for found in self._search(depth):
+            self._write()
+            return True
+        return False
+
+    def solutions(self, limit=None, distinct=True):
+        '''
+            Enumerates complete schedules without modifying the calendar, the search resumes where it stopped after each one
+            Backjumping and symmetry are turned off meanwhile, they could skip schedules.
+            @params limit: maximum number of schedules, None for all of them
+            @params distinct: T/F whether to skip schedules which only swap employees who are interchangeable
+                              (same availability, caps & priority, and the same shifts assigned before the search).
+                              The search only gives a shift to the first employee of such a class who has no shift yet,
+                              so the employees of a class take their first shifts in order and each schedule is reached
+                              once instead of once per permutation.
+
+            @return: generator of schedules, each a tuple of (dayNum, lunch, (hour, minute), employee name) for every shift in calendar order
+        '''
+        backjump = self.backjump
+        symmetry = self.symmetry
+        self.backjump = False
+        self.symmetry = False
+        self.distinct = distinct
+        try:
+            count = 0
+            for found in self._search(-1):
+                m = self.matrix
+                yield tuple([(m.shiftDay[s], m.shiftLunch[s], m.shiftTime[s], m.names[self.assignment[s]]) for s in range(0, m.numShifts())])
+                count += 1
+                if limit != None and count >= limit:
+                    return
+        finally:
+            self.backjump = backjump
+            self.symmetry = symmetry
+            self.distinct = False
+
+    def _symmetryClasses(self):
+        '''Groups the employees with the same availability and caps, self.symClass[e] is the group of e or None if e is alone'''
+        m = self.matrix
+        groups = {}
+        for e in range(0, m.numEmployees()):
+            groups.setdefault((m.available[e], m.maxShifts[e], m.maxShiftsPW[e]), []).append(e)
+        self.symClass = [None]*m.numEmployees()
+        for key in groups.keys():
+            if len(groups[key]) > 1:
+                for e in groups[key]:
+                    self.symClass[e] = key
+
+    def _symmetryState(self, e):
+        '''@return: what the rest of the search depends on for employee e: counters and the open shifts whose domain has e'''
+        bits = 0
+        bit = 1 << e
+        for i in range(0, len(self.open)):
+            t = self.open[i]
+            if self.assignment[t] == None and self.domains[t] & bit:
+                bits |= 1 << i
+        return (self.monthCount[e], tuple(self.weekCount[e]), bits)
+
+    def _symmetryFailed(self, entry, e):
+        '''Remembers that employee e failed for the shift of the stack entry, in the current state'''
+        if self.symClass[e] != None:
+            entry[5].setdefault(self.symClass[e], set()).add(self._symmetryState(e))
+
+    def _symmetrySkip(self, entry, e):
+        '''@return: True if an employee interchangeable with e and in the same state already failed for the shift of the stack entry'''
+        cls = self.symClass[e]
+        return cls != None and cls in entry[5] and self._symmetryState(e) in entry[5][cls]
+
+    def _classes(self):
+        '''@return: list of the groups of interchangeable employees, see solutions'''
+        m = self.matrix
+        fixed = [[] for e in range(0, m.numEmployees())]
+        for s in range(0, m.numShifts()):
+            if self.assignment[s] != None:
+                fixed[self.assignment[s]].append(s)
+        groups = {}
+        for e in range(0, m.numEmployees()):
+            key = (m.available[e], m.maxShifts[e], m.maxShiftsPW[e], m.priorities[e], tuple(fixed[e]))
+            groups.setdefault(key, []).append(e)
+        return list(groups.values())
+
+    def _unusedTwin(self, e):
+        '''
+            @return: True if neither employee e nor the previous employee of its class has a shift from the search yet,
+                     e would only give permutations of the schedules where the previous one takes that shift
+        '''
+        p = self.previous[e]
+        return p != None and self.monthCount[e] == self.startCount[e] and self.monthCount[p] == self.startCount[p]
+
+    def _search(self, depth):
+        '''
+            Generator behind solve and solutions, see solve
+            Yields each time every open shift is filled (or depth shifts are), the assignment is then in self.assignment.
+            Resuming it undoes the last decision and goes on with the search.
+        '''
+        self._load()
+        self.nodes = 0
+        self.jumps = 0
+        self.stopped = False
+        self.best = list(self.assignment)
+        bestFilled = 0
+        if self.forwardCheck:
+            for s in self.open:
+                if self.domains[s] == 0:
+                    return
+        if self.matching:
+            for dayNum in self.openByDay.keys():
+                if not self._dayMatchable(dayNum):
+                    return
+
+        self.previous = [None]*self.matrix.numEmployees() #previous employee of the same class (distinct only)
+        self.startCount = list(self.monthCount)
+        if self.distinct:
+            for group in self._classes():
+                for i in range(1, len(group)):
+                    self.previous[group[i]] = group[i-1]
+        if self.symmetry:
+            self._symmetryClasses()
+        self.order.start(self)
+        self.valueOrder.start(self)
+        self.levelOf = {} #shift -> level of the decision which assigned it
+        stack = self.stack
+        cur = None #entry of the shift currently being decided
+
+        while True:
+            if cur == None:
+                if len(stack) == len(self.open):
+                    yield True
+                    if len(stack) == 0:
+                        return
+                    cur = stack.pop()
+                    self._undo(cur[0], cur[3])
+                    continue
+
+                #Stop scheduling for testing purposes
+                if len(stack) == depth:
+                    yield True
+                    return
+
+                s = self.order.select()
+                cur = [s, self.valueOrder.candidates(s), None, 0, set(), {}]
+
+            s, cands = cur[0], cur[1]
+            level = len(stack)
+            if self.symmetry and cur[2] != None:
+                #back from the subtree of cur[2], it failed
+                self._symmetryFailed(cur, cur[2])
+                cur[2] = None
+
+            placed = False
+            while len(cands) > 0:
+                e = heapq.heappop(cands)[1]
+                self.nodes += 1
+                if self._outOfBudget():
+                    self.stopped = True
+                    self.assignment = self.best
+                    self._write()
+                    return
+                if not self._canWork(e, s):
+                    continue
+                if self.distinct and self._unusedTwin(e):
+                    continue
+                if self.backjump:
+                    culprits = self._nogoodLevels(s, e)
+                    if culprits != None:
+                        cur[4].update(culprits)
+                        if self.symmetry:
+                            self._symmetryFailed(cur, e)
+                        continue
+                if self.symmetry and self._symmetrySkip(cur, e):
+                    if self.backjump:
+                        cur[4].update(range(0, level)) #the states being equal depends on every earlier decision
+                    continue
+
+                mark = len(self.trail)
+                self._assign(s, e)
+                if self.backjump:
+                    self._watch(s, e, level)
+                if self._propagate(s, e):
+                    cur[2] = e
+                    cur[3] = mark
+                    self.levelOf[s] = level
+                    stack.append(cur)
+                    if len(stack) > bestFilled:
+                        bestFilled = len(stack)
+                        self.best = list(self.assignment)
+                    cur = None
+                    placed = True
+                    break
+                if self.backjump:
+                    for t in self.failed:
+                        cur[4].update(self._conflictLevels(t, level))
+                self._undo(s, mark)
+                if self.symmetry:
+                    self._symmetryFailed(cur, e)
+
+            if placed:
+                continue
+
+            #Went through all candidates for this shift, undo the previous assignment and try its next candidate
+            self.order.update(s)
+            if len(stack) == 0:
+                return
+
+            if not self.backjump:
+                cur = stack.pop()
+                self._undo(cur[0], cur[3])
+                continue
+
+            conflict = cur[4] | self._conflictLevels(s)
+            if len(conflict) == 0:
+                return #the shift cannot be filled whatever the earlier decisions are
+            self._learn(conflict)
+            back = max(conflict)
+            if back < len(stack) - 1:
+                self.jumps += 1
+            while len(stack) > back + 1:
+                entry = stack.pop()
+                self._undo(entry[0], entry[3])
+            cur = stack.pop()
+            self._undo(cur[0], cur[3])
+            conflict.discard(back)
+            cur[4].update(conflict)
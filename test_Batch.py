@@ -0,0 +1,39 @@
+#Tests of Batch: every job is searched by a worker with its own config
+#Run with python -m unittest test_Batch (or pytest)
+import unittest
+
+from Benchmark import buildScheduler, quiet
+from Batch import Batch
+from Result import SolveResult
+
+class BatchTest(unittest.TestCase):
+
+    def solve(self, configs, workers):
+        '''@return: list of SolveResult of the same month solved once per config'''
+        batch = Batch(workers)
+        for config in configs:
+            batch.add(buildScheduler(seed=2), config)
+        with quiet():
+            return batch.run()
+
+    def checkValueOrder(self, workers):
+        byPriority, fewest = self.solve([{"valueOrder" : "priority"}, {"valueOrder" : "fewest"}], workers)
+        for res in (byPriority, fewest):
+            self.assertEqual(res.status, SolveResult.SOLVED)
+            self.assertEqual(res.filled, res.numOpen)
+            self.assertGreater(res.stats["nodes"], 0) #the worker searched, it wasn't given a filled model
+        self.assertNotEqual(byPriority.schedule, fewest.schedule)
+
+    def testValueOrderInProcess(self):
+        self.checkValueOrder(1)
+
+    def testValueOrderInWorkers(self):
+        self.checkValueOrder(2)
+
+    def testNodeLimit(self):
+        res = self.solve([{"nodeLimit" : 5}], 1)[0]
+        self.assertEqual(res.status, SolveResult.TIMEOUT)
+        self.assertLessEqual(res.stats["nodes"], 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+#Differential test of the compiled rules against the matchRule of Employee.py before the masks
+#Run with python -m unittest test_CompiledRules (or pytest)
+import contextlib
+import io
+import random
+import unittest
+
+from Time import Time
+from Rule import Rule
+from Employee import Employee
+from CompiledRules import CompiledRules
+
+class BaselineEmployee:
+    '''
+        matchRule and _matchLunchField are copied unchanged (only re-indented) from Employee.py before its rules were
+        compiled into masks, the behaviour every way of matching a shift must keep. With no shift worked yet the caps
+        never refuse a shift in either version.
+    '''
+
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = rules
+        self.curShifts = 0
+
+    def matchRule(self, shiftRule):
+        '''
+            Given keyword arguments as in Rule class it determines if employee's stored rules match this rule
+            A match is when one or more of the rules match given rule
+            @params lunch = True if this is a lunch shift False if this is a dinner shift
+            @params time = string "h:mm" hour at which shift starts
+            @params weekday = 0-6 indicating which day of the week, 0=Monday, 6=Sunday
+            @params weeknum = 1-4, applies rule to a specific week of the month
+            @params daynum = 1-31, applies rule to a specific day of the month
+
+            weekday, weeknum, daynum CANNOT be lists
+
+            @return: -1 if rule is invalid, False if no match, True if match
+        '''
+        matchRule = shiftRule.getDict()
+
+        if "maxshifts" in matchRule.keys():
+            print("maxshifts rule not allowed")
+            return -1
+
+        if "maxshiftsPW" in matchRule.keys():
+            print("maxshiftsPW rule not allowed")
+            return -1        
+
+        if "lunch" not in matchRule.keys():
+            print("must specify lunch=True/False")
+            return -1
+
+        assert len(matchRule) == 5, "Shift Rule must be complete"
+
+        lunch = matchRule["lunch"]
+        allowed = False #match occurs if atleast 1 rule fits
+        
+        for r in self.rules:
+            print("Allowed? %s"%allowed)
+            print("curRule:\n%s"%r)
+            emp_rule = r.rule
+
+            if "maxshifts" in emp_rule:
+                if ((self.curShifts+1)<=emp_rule["maxshifts"]) == False:
+                    print("Already at MaxShifts")
+                    return False
+                else:
+                    continue
+
+            if "maxshifspw" in emp_rule:
+                cur_weeknum = matchRule["weekday"]
+                if (self.shiftPerWeek[cur_weeknum-1]+1) >= emp_rule["maxshiftspw"]:
+                    print("Already max shifts for this week")
+                    return False
+                else:
+                    continue
+
+            if "exclude" in emp_rule:
+                if self._matchLunchField(emp_rule, lunch):
+                    if matchRule["daynum"][0] in emp_rule["exclude"]:
+                        #daynum specified is excluded so return False
+                        return False
+
+
+            if "daynum" in emp_rule: #means rule should have fields lunch (optional), time, daynum only dont take into account anything else
+                # assert len(rule) == 3, "Rule has invalid format"
+
+                if self._matchLunchField(emp_rule, lunch): # matches lunch fields in both rules
+                    print("Matched lunch field")
+
+                    if matchRule["daynum"][0] in emp_rule["daynum"]:
+                        print("daynum matched")
+                        
+                        if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
+                            allowed = True
+                        else:
+                            print("time match failed")
+                            # print(type(emp_rule["time"]))
+                            # print(type(matchRule["time"]))
+                            # print("x <= y: %s"%(emp_rule["time"] <= matchRule["time"]))
+                            # print(emp_rule["time"])
+                            # print(matchRule["time"])
+                        
+                    else:
+                        print("daynum failed")
+                        # print(type(matchRule["daynum"]))
+                        continue
+
+                else: #doesnt match lunch field
+                    print("lunch field match failed, skipping rule")
+                    continue
+
+            elif "weekday" in emp_rule: #rule will match with fields lunch(optional), time, weekday, weeknum(optional)
+
+                if self._matchLunchField(emp_rule, lunch):
+                    print("Matched lunch field")
+
+                    if matchRule["weekday"][0] in emp_rule["weekday"]:
+                        print("Weekday match")
+
+                        if ("weeknum" in emp_rule):
+                            if matchRule["weeknum"][0] in emp_rule["weeknum"]:
+                                print("employee rule has weeknum field and it matches")
+                                if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
+                                    allowed = True
+
+                            else:
+                                print("employee rule has weeknum field but it doesnt match")
+                                continue
+
+                        else:
+                            print("employee rule does not have weeknum field")
+                            if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
+                                allowed = True
+
+                    else:
+                        print("Weekday mismatch")
+                        continue
+
+                else:
+                    print("lunch field match failed, skipping rule")
+                    continue
+
+            elif "weeknum" in emp_rule: #rule will match with lunch (optional) , time, weekday(optional)
+                
+                if self._matchLunchField(emp_rule, lunch):
+                    print("Matched lunch field")
+
+                    if matchRule["weeknum"][0] in emp_rule["weeknum"]:
+                        print("Weeknum match")
+
+                        if ("weekday" in emp_rule):
+                            if matchRule["weekday"][0] in emp_rule["weekday"]:
+                                print("employee rule has weekday field and it matches")
+                                if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
+                                    allowed = True
+
+                            else:
+                                print("employee rule has weekday field but it doesnt match")
+                                continue
+
+                        else:
+                            print("employee rule does not have weekday field")
+                            if emp_rule["time"] <= matchRule["time"]: #employee can work at or before that time
+                                allowed = True
+
+                    else:
+                        print("Weekday mismatch")
+                        continue
+
+                else:
+                    print("lunch field match failed, skipping rule")
+                    continue 
+
+            print("")
+
+        print("Done matching employee %s, allowed = %s"%(self.name, allowed))
+        return allowed
+
+    def _matchLunchField(self, emp_rule, matchLunch):
+        '''
+            helper function to match optional lunch field if it is present in employee's rule
+        '''
+        if "lunch" in emp_rule:
+            cur_lunch = emp_rule["lunch"]
+            return cur_lunch == matchLunch
+        else:
+            return True #ommited lunch field means default yes for lunch and dinner
+
+class CompiledRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(2014)
+
+    def randomTime(self):
+        return Time(self.rng.randint(0, 23), self.rng.choice([0, 15, 30, 45]))
+
+    def randomRule(self):
+        '''@return: Rule with the fields of a daynum, weekday, weekday + weeknum, weeknum, exclude or cap rule, lunch or not'''
+        rng = self.rng
+        kind = rng.randrange(7)
+        fields = {}
+        if rng.random() < 0.4:
+            fields["lunch"] = rng.random() < 0.5
+        if kind == 0:
+            fields["daynum"] = rng.sample(range(1, 32), rng.randint(1, 5))
+        elif kind == 1:
+            fields["weekday"] = rng.sample(range(0, 7), rng.randint(1, 4))
+            if rng.random() < 0.5:
+                fields["weeknum"] = rng.sample(range(1, 7), rng.randint(1, 3))
+        elif kind == 2:
+            fields["weeknum"] = rng.sample(range(1, 7), rng.randint(1, 3))
+        elif kind == 3:
+            fields["exclude"] = rng.sample(range(1, 32), rng.randint(1, 4))
+            return Rule(**fields)
+        elif kind == 4:
+            return Rule(maxshifts=rng.randint(1, 9))
+        elif kind == 5:
+            return Rule(maxshiftspw=rng.randint(1, 4))
+        fields["time"] = self.randomTime()
+        return Rule(**fields)
+
+    def randomShift(self):
+        '''@return: (lunch, time, weekday, weeknum, daynum) of a shift'''
+        rng = self.rng
+        return (rng.random() < 0.5, self.randomTime(), rng.randrange(7), rng.randint(1, 6), rng.randint(1, 31))
+
+    def checkShift(self, employee, shift):
+        '''Checks every way of matching shift against the baseline matchRule on the employee's current rules'''
+        lunch, time, weekday, weeknum, daynum = shift
+        shiftRule = Rule(lunch=lunch, time=time, weekday=weekday, weeknum=weeknum, daynum=daynum)
+        expected = BaselineEmployee(employee.getName(), list(employee.getRules())).matchRule(shiftRule)
+        message = "rules %s, shift %s"%([r.rule for r in employee.getRules()], shift)
+        self.assertEqual(CompiledRules(employee.getRules()).match(*shift), expected, message)
+        self.assertEqual(employee.matchAvailability(*shift), expected, message)
+        self.assertEqual(employee.canWork(*shift), expected, message)
+        self.assertEqual(employee.matchRule(shiftRule), expected, message)
+
+    def testMatchesBaseline(self):
+        checked = 0
+        with contextlib.redirect_stdout(io.StringIO()): #Rule and matchRule print
+            for trial in range(0, 1000):
+                employee = Employee("e%d"%(trial), 1)
+                for i in range(0, self.rng.randint(0, 5)):
+                    employee.setRule(self.randomRule())
+                for query in range(0, 40):
+                    self.checkShift(employee, self.randomShift())
+                    checked += 1
+        self.assertEqual(checked, 40000)
+
+    def testRuleEdits(self):
+        '''setRule and deleteRule recompile the masks: the same shifts are checked after each edit'''
+        with contextlib.redirect_stdout(io.StringIO()):
+            for trial in range(0, 200):
+                employee = Employee("e%d"%(trial), 1)
+                shifts = [self.randomShift() for i in range(0, 15)]
+                for edit in range(0, 8):
+                    for shift in shifts:
+                        self.checkShift(employee, shift)
+                    rules = employee.getRules()
+                    if len(rules) > 0 and self.rng.random() < 0.4:
+                        self.assertEqual(employee.deleteRule(self.rng.choice(rules)), 1)
+                    else:
+                        employee.setRule(self.randomRule())
+                for shift in shifts:
+                    self.checkShift(employee, shift)
+
+    def testEdges(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            rules = [Rule(lunch=False, weekday=[0, 6], weeknum=[1, 6], time="17:00"), Rule(daynum=[31], time="11:00"),
+                     Rule(lunch=True, exclude=[1])]
+        compiled = CompiledRules(rules)
+        self.assertTrue(compiled.match(False, Time(17, 0), 6, 6, 30)) #time equal to the start, last weekday & week
+        self.assertFalse(compiled.match(False, Time(16, 59), 6, 6, 30))
+        self.assertFalse(compiled.match(True, Time(17, 0), 6, 6, 30)) #dinner only
+        self.assertTrue(compiled.match(True, Time(11, 0), 0, 5, 31))
+        self.assertFalse(compiled.match(True, Time(12, 0), 0, 1, 1)) #lunch excluded on day 1
+        self.assertFalse(CompiledRules([]).match(True, Time(12, 0), 0, 1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
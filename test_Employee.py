@@ -0,0 +1,71 @@
+#Tests of the shifts Employee.canWork remembers (see Employee.matchCacheSize)
+#Run with python -m unittest test_Employee (or pytest)
+import contextlib
+import io
+import unittest
+
+from Time import Time
+from Rule import Rule
+from Employee import Employee
+from Scheduler import Scheduler
+
+class MatchCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()): #Rule prints its fields
+            self.employee = Employee("Sam", 1)
+            self.employee.setRule(Rule(weekday=[0, 1, 2], time="17:00"))
+
+    def testLookupsAndMisses(self):
+        e = self.employee
+        self.assertTrue(e.canWork(False, Time(18, 0), 1, 2, 10))
+        self.assertTrue(e.canWork(False, Time(18, 0), 1, 2, 10))
+        self.assertFalse(e.canWork(False, Time(18, 0), 5, 2, 14))
+        self.assertEqual((e.matchLookups, e.matchMisses), (3, 2))
+
+    def testSetRuleAfterLookup(self):
+        e = self.employee
+        self.assertFalse(e.canWork(False, Time(18, 0), 5, 2, 14))
+        with contextlib.redirect_stdout(io.StringIO()):
+            saturday = Rule(weekday=[5], time="17:00")
+            e.setRule(saturday)
+        self.assertTrue(e.canWork(False, Time(18, 0), 5, 2, 14))
+        with contextlib.redirect_stdout(io.StringIO()):
+            e.setRule(Rule(exclude=[14]))
+        self.assertFalse(e.canWork(False, Time(18, 0), 5, 2, 14))
+        self.assertEqual(e.matchMisses, 3)
+
+    def testDeleteRuleAfterLookup(self):
+        e = self.employee
+        self.assertTrue(e.canWork(False, Time(18, 0), 1, 2, 10))
+        self.assertEqual(e.deleteRule(e.getRule(0)), 1)
+        self.assertFalse(e.canWork(False, Time(18, 0), 1, 2, 10))
+
+    def testCapsNotRemembered(self):
+        e = self.employee
+        with contextlib.redirect_stdout(io.StringIO()):
+            e.setRule(Rule(maxshiftspw=1))
+            self.assertTrue(e.canWork(False, Time(18, 0), 1, 2, 10))
+            e.addShift(2)
+            self.assertFalse(e.canWork(False, Time(18, 0), 1, 2, 10))
+            e.removeShift(2)
+            self.assertTrue(e.canWork(False, Time(18, 0), 1, 2, 10))
+
+    def testBounded(self):
+        e = self.employee
+        for day in range(1, 32):
+            for hour in range(0, 24):
+                e.canWork(hour < 15, Time(hour, 0), day % 7, (day - 1)//7 + 1, day)
+        self.assertEqual(len(e.matchCache), Employee.matchCacheSize)
+
+    def testMatchShift(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            sched = Scheduler(3, 2015)
+            sched.addEmployee(self.employee)
+            self.assertTrue(sched.matchShift(self.employee, False, "18:00", 1, 2, 10))
+            self.assertFalse(sched.matchShift(self.employee, False, "16:00", 1, 2, 10))
+            self.assertTrue(sched.matchShift(self.employee, False, Time(18, 0), 1, 2, 10))
+        self.assertEqual(sched.matchStats(), (3, 2))
+
+if __name__ == "__main__":
+    unittest.main()
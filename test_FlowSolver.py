@@ -0,0 +1,74 @@
+#Tests of the flow engine against every schedule of small months
+#Run with python -m unittest test_FlowSolver (or pytest)
+import contextlib
+import io
+import random
+import unittest
+
+from Time import Time
+from Rule import Rule
+from Employee import Employee
+from Scheduler import Scheduler
+from FlowSolver import FlowSolver
+
+class FlowSolverTest(unittest.TestCase):
+
+    def month(self, rng, priorities):
+        '''@return: Scheduler of a few days of March 2015 with an employee of each priority'''
+        sched = Scheduler(3, 2015)
+        for day in range(1, 6):
+            if rng.random() < 0.5:
+                sched.createShiftD([day], [Time(11, 0)], True)
+            sched.createShiftD([day], [Time(17, 0), Time(18, 0)][:rng.randint(1, 2)], False)
+        for i in range(0, len(priorities)):
+            e = Employee("e%d"%(i), priorities[i])
+            e.setRule(Rule(weekday=sorted(rng.sample(range(0, 7), rng.randint(3, 7))), time="10:00"))
+            if rng.random() < 0.4:
+                e.setRule(Rule(maxshifts=rng.randint(1, 3)))
+            if rng.random() < 0.3:
+                e.setRule(Rule(maxshiftspw=rng.randint(1, 2)))
+            sched.addEmployee(e)
+        return sched
+
+    def cheapest(self, sched):
+        '''@return: lowest sum of the priorities over every schedule of the month, None if there is none'''
+        priority = {}
+        for e in sched.employeeList:
+            priority[e.getName()] = e.priority
+        costs = [sum([priority[name] for dayNum, lunch, t, name in schedule]) for schedule in sched.schedules(distinct=False)]
+        if len(costs) == 0:
+            return None
+        return min(costs)
+
+    def testNegativePriorities(self):
+        rng = random.Random(2015)
+        solved = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for trial in range(0, 40):
+                sched = self.month(rng, [rng.randint(-4, 3) for i in range(0, 4)])
+                best = self.cheapest(sched)
+                solver = FlowSolver(sched)
+                res = solver.solve()
+                self.assertEqual(res, best != None)
+                if res:
+                    self.assertEqual(solver.cost, best)
+                    schedule = sched.getSchedule()
+                    self.assertEqual(sum([e.priority for dayNum, lunch, t, e in schedule]), best)
+                    solved += 1
+        self.assertGreater(solved, 10)
+
+    def testNegativeEmployeePreferred(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            sched = Scheduler(3, 2015)
+            sched.createShiftD([2, 3, 4], [Time(17, 0)], False)
+            for name, priority in (("low", -3), ("mid", 0), ("high", 2)):
+                e = Employee(name, priority)
+                e.setRule(Rule(weekday=list(range(0, 7)), time="10:00"))
+                sched.addEmployee(e)
+            solver = FlowSolver(sched)
+            self.assertTrue(solver.solve())
+        self.assertEqual([e.getName() for dayNum, lunch, t, e in sched.getSchedule()], ["low", "low", "low"])
+        self.assertEqual(solver.cost, -9)
+
+if __name__ == "__main__":
+    unittest.main()